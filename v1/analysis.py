@@ -0,0 +1,134 @@
+import threading
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from history import AnalysisCancelled
+from diagnostics import Diagnostics, collecting
+from results import export_results
+from metrics import (compute_time_metrics, compute_code_metrics, compute_graph_metrics,
+                     open_stats_cache, open_complexity_index)
+
+
+class AnalysisSignals(QObject):
+    progress = pyqtSignal(int, str)
+    result = pyqtSignal(int, str, object)
+    failed = pyqtSignal(int, str, str)
+    finished = pyqtSignal(int)
+
+
+class AnalysisJob(QRunnable):
+    STAGES = ("time", "graph", "code")
+
+    def __init__(self, job_id, project_path, since, until, idle_gap, cache_dir, history_store, stages=STAGES,
+                 profile=False, export_path=None, pool=None, context=None):
+        super().__init__()
+        self.job_id = job_id
+        self.stages = stages
+        self.project_path = project_path
+        self.since = since
+        self.until = until
+        self.idle_gap = idle_gap
+        self.cache_dir = cache_dir
+        self.history_store = history_store
+        self.cancelled = threading.Event()
+        self.diagnostics = Diagnostics(profile)
+        self.export_path = export_path
+        self.pool = pool
+        self.context = context
+        self.results = {}
+        self.signals = AnalysisSignals()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            with collecting(self.diagnostics):
+                self.analyze()
+        except AnalysisCancelled:
+            self.diagnostics.count("cancelled")
+        except Exception as e:
+            self.report_error("history", "Ошибка при анализе репозитория", e)
+        finally:
+            self.signals.finished.emit(self.job_id)
+
+    def analyze(self):
+        self.signals.progress.emit(self.job_id, "Чтение истории коммитов...")
+        try:
+            stats_cache = open_stats_cache(self.cache_dir)
+            try:
+                with self.diagnostics.stage("history"):
+                    history = self.history_store.load(self.project_path, self.since, self.until,
+                                                      stats_cache=stats_cache, cancelled=self.cancelled)
+            finally:
+                stats_cache.close()
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            self.report_error("history", "Ошибка при анализе репозитория", e)
+            self.skip_export(["history"])
+            return
+
+        if "time" in self.stages:
+            self.run_stage("time", "Ошибка при анализе репозитория", compute_time_metrics, history, None,
+                           self.idle_gap)
+        if "graph" in self.stages:
+            self.run_stage("graph", "Ошибка при построении графиков", compute_graph_metrics, history)
+        if "code" in self.stages:
+            self.signals.progress.emit(self.job_id, "Анализ сложности кода...")
+            try:
+                complexity_index = open_complexity_index(self.cache_dir)
+            except Exception as e:
+                self.report_error("code", "Ошибка при анализе кода", e)
+            else:
+                try:
+                    self.run_stage("code", "Ошибка при анализе кода", compute_code_metrics, history,
+                                   complexity_index, None, self.cancelled, self.pool)
+                finally:
+                    complexity_index.close()
+        if not self.export_path:
+            return
+        failed = [stage for stage in self.STAGES if stage not in self.results]
+        if failed:
+            self.skip_export(failed)
+        else:
+            self.export(history)
+
+    def skip_export(self, failed):
+        if not self.export_path:
+            return
+        if len(failed) == 1:
+            reason = f"этап {failed[0]} завершился с ошибкой"
+        else:
+            reason = f"этапы {', '.join(failed)} завершились с ошибкой"
+        self.signals.failed.emit(self.job_id, "export", f"Сохранение результатов пропущено: {reason}")
+
+    def export(self, history):
+        self.signals.progress.emit(self.job_id, "Сохранение результатов...")
+        report = dict(self.results, project_path=self.project_path, since=self.since, until=self.until)
+        try:
+            with self.diagnostics.stage("export"):
+                export_results(self.export_path, history, report)
+        except Exception as e:
+            self.report_error("export", "Ошибка при сохранении результатов", e)
+            return
+        self.signals.result.emit(self.job_id, "export", self.export_path)
+
+    def run_stage(self, tab, error_prefix, compute, *args):
+        if self.cancelled.is_set():
+            raise AnalysisCancelled()
+        try:
+            with self.diagnostics.stage(tab):
+                metrics = compute(*args)
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            self.report_error(tab, error_prefix, e)
+            return
+        if self.cancelled.is_set():
+            raise AnalysisCancelled()
+        self.results[tab] = metrics
+        self.signals.result.emit(self.job_id, tab, metrics)
+
+    def report_error(self, tab, error_prefix, error):
+        self.diagnostics.error(tab, error)
+        self.signals.failed.emit(self.job_id, tab, f"{error_prefix}: {str(error)}\n"
+                                                   f"Подробности в окне диагностики")
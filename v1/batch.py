@@ -0,0 +1,96 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from metrics import analyze_repository
+from sessions import DEFAULT_IDLE_GAP
+
+
+def find_repositories(paths):
+    repositories = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.exists(os.path.join(path, '.git')):
+            repositories.append(path)
+        elif os.path.isdir(path):
+            with os.scandir(path) as entries:
+                repositories.extend(sorted(entry.path for entry in entries
+                                           if entry.is_dir() and os.path.exists(os.path.join(entry.path, '.git'))))
+    return list(dict.fromkeys(repositories))
+
+
+def analyze_one(project_path, since, until, max_count, cache_dir, idle_gap):
+    try:
+        return project_path, analyze_repository(project_path, since, until, max_count, cache_dir, 1, idle_gap), None
+    except Exception as e:
+        return project_path, None, str(e)
+
+
+def analyze_batch(repositories, since=None, until=None, max_count=None, cache_dir=None,
+                  idle_gap=DEFAULT_IDLE_GAP, jobs=None, on_result=None):
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(analyze_one, path, since, until, max_count, cache_dir, idle_gap)
+                   for path in repositories]
+        for future in as_completed(futures):
+            project_path, report, error = future.result()
+            results[project_path] = (report, error)
+            if on_result is not None:
+                on_result(project_path, report, error)
+    return [(path, *results[path]) for path in repositories]
+
+
+def repository_summary(project_path, report, error):
+    if report is None:
+        return {"project_path": project_path, "error": error}
+    code = report["code"]
+    return {
+        "project_path": project_path,
+        "error": None,
+        "commits": report["time"]["commits"],
+        "added_lines": code["added_lines"],
+        "deleted_lines": code["deleted_lines"],
+        "python_files": code["python_files"],
+        "avg_cc": code["avg_cc"],
+        "weekly_hours": report["time"]["weekly_hours"],
+        "hotspots": code["hotspots"],
+    }
+
+
+def aggregate_reports(results):
+    reports = [report for _, report, _ in results if report is not None]
+    heatmap = np.zeros((7, 24))
+    weeks = max((report["graph"]["weeks"] for report in reports), default=4)
+    commits_per_week = np.zeros(weeks, dtype=np.int64)
+    hotspots = []
+    total_cc = 0
+    python_files = 0
+    parsed_files = 0
+    for project_path, report, _ in results:
+        if report is None:
+            continue
+        heatmap += report["time"]["heatmap"]
+        repository_weeks = report["graph"]["commits_per_week"]
+        commits_per_week[weeks - len(repository_weeks):] += repository_weeks
+        total_cc += report["code"]["total_cc"]
+        python_files += report["code"]["python_files"]
+        parsed_files += len(report["code"]["file_complexity"])
+        name = os.path.basename(project_path)
+        hotspots.extend(dict(hotspot, path=f"{name}/{hotspot['path']}")
+                        for hotspot in report["code"]["refactoring_candidates"])
+
+    return {
+        "repositories": [repository_summary(*result) for result in results],
+        "summary": {
+            "repositories": len(results),
+            "failed": len(results) - len(reports),
+            "commits": sum(report["time"]["commits"] for report in reports),
+            "added_lines": sum(report["code"]["added_lines"] for report in reports),
+            "deleted_lines": sum(report["code"]["deleted_lines"] for report in reports),
+            "python_files": python_files,
+            "avg_cc": total_cc / parsed_files if parsed_files else 0,
+            "heatmap": heatmap,
+            "commits_per_week": commits_per_week,
+            "refactoring_candidates": heapq.nlargest(10, hotspots, key=lambda hotspot: hotspot["score"]),
+        },
+    }
@@ -0,0 +1,196 @@
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from history import iter_log, load_history
+from cache import StatsCache, ComplexityIndex
+from complexity import scan_complexity, indexed_complexity
+from discovery import iter_project_files
+from hotspots import rank_hotspots
+from metrics import compute_time_metrics, compute_graph_metrics
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+TIMEZONES = ("+0000", "+0300", "-0500", "+0530", "+0900")
+
+
+def python_source(seed, lines):
+    source = []
+    index = 0
+    while len(source) < lines:
+        source += [
+            f"def func_{seed}_{index}(value):",
+            f"    if value > {index}:",
+            f"        return value - {index}",
+            f"    for item in range({index % 7 + 1}):",
+            f"        if item % 2 and value:",
+            f"            value += item",
+            f"    return value",
+            "",
+        ]
+        index += 1
+    return "\n".join(source) + "\n"
+
+
+def generate_repository(path, commits=1000, files=200, authors=10, lines=200, seed=0):
+    rng = random.Random(seed)
+    subprocess.run(["git", "init", "-q", path], check=True)
+    subprocess.run(["git", "-C", path, "symbolic-ref", "HEAD", "refs/heads/master"], check=True)
+    process = subprocess.Popen(["git", "-C", path, "fast-import", "--quiet"], stdin=subprocess.PIPE)
+
+    def write(text):
+        process.stdin.write(text.encode() if isinstance(text, str) else text)
+
+    def data(content):
+        content = content.encode()
+        write(f"data {len(content)}\n")
+        write(content)
+        write("\n")
+
+    paths = [f"pkg{index % 20}/module_{index}.py" for index in range(files)]
+    people = [(f"Developer {index}", f"dev{index}@example.com", TIMEZONES[index % len(TIMEZONES)])
+              for index in range(authors)]
+    gaps = [rng.randint(60, 3600) for _ in range(commits)]
+    timestamp = int(time.time()) - sum(gaps)
+    for number, gap in enumerate(gaps, 1):
+        name, email, tz = people[rng.randrange(authors)]
+        timestamp += gap
+        write(f"commit refs/heads/master\nmark :{number}\n")
+        write(f"author {name} <{email}> {timestamp} {tz}\ncommitter {name} <{email}> {timestamp} {tz}\n")
+        data(f"Commit {number}")
+        if number > 1:
+            write(f"from :{number - 1}\n")
+        changed = paths if number == 1 else rng.sample(paths, min(files, rng.randint(1, 4)))
+        for file in changed:
+            write(f"M 100644 inline {file}\n")
+            data(python_source(rng.randrange(1 << 30), lines + rng.randint(-lines // 4, lines // 4)))
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError("git fast-import завершился с ошибкой")
+    subprocess.run(["git", "-C", path, "reset", "-q", "--hard"], check=True)
+
+
+def children_peak_mb():
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def render(time_metrics, graph_metrics):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=(8, 4), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    heatmap_axes, trend_axes = figure.subplots(1, 2)
+    heatmap_axes.imshow(time_metrics["heatmap"], cmap='hot', interpolation='nearest')
+    trend_axes.plot(range(graph_metrics["weeks"]), graph_metrics["commits_per_week"], marker='o')
+    canvas.draw()
+
+
+def run_stages(path, workers, stage):
+    state = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        stats_cache = StatsCache(os.path.join(cache_dir, "stats.sqlite"))
+        complexity_index = ComplexityIndex(os.path.join(cache_dir, "complexity.sqlite"))
+        try:
+            stage("history", lambda: sum(1 for _ in iter_log(path)), lambda count: count)
+            stage("stats", lambda: load_history(path, stats_cache=stats_cache), len)
+            history = stage("stats (кэш)", lambda: load_history(path, stats_cache=stats_cache), len)
+            files = stage("discovery", lambda: list(iter_project_files(path, ('.py',))), len)
+            stage("complexity", lambda: scan_complexity(files, workers), len)
+            stage("complexity (индекс, холодный)",
+                  lambda: indexed_complexity(path, files, complexity_index, workers), len)
+            stage("complexity (индекс, тёплый)",
+                  lambda: indexed_complexity(path, files, complexity_index, workers), len)
+            state["time"] = stage("aggregation: time", lambda: compute_time_metrics(history),
+                                  lambda _: len(history))
+            state["graph"] = stage("aggregation: graph", lambda: compute_graph_metrics(history),
+                                   lambda _: len(history))
+            stage("aggregation: hotspots", lambda: rank_hotspots(history), lambda _: len(history.file_ids))
+            stage("rendering", lambda: render(state["time"], state["graph"]))
+        finally:
+            stats_cache.close()
+            complexity_index.close()
+
+
+def run_benchmark(path, workers=None):
+    import matplotlib.backends.backend_agg  # imported here so the rendering stage does not time it
+    results = []
+    peaks = []
+
+    def timed(name, function, items=None):
+        started = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - started
+        count = items(value) if items else None
+        results.append({
+            "stage": name,
+            "seconds": elapsed,
+            "items": count,
+            "throughput": count / elapsed if count is not None and elapsed > 0 else None,
+        })
+        return value
+
+    def traced(name, function, items=None):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        value = function()
+        peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / (1 << 20))
+        return value
+
+    run_stages(path, workers, timed)
+    tracemalloc.start()
+    try:
+        run_stages(path, workers, traced)
+    finally:
+        tracemalloc.stop()
+    for row, peak in zip(results, peaks):
+        row["python_peak_mb"] = peak
+    return results
+
+
+def benchmark(commits=1000, files=200, authors=10, lines=200, seed=0, workers=None, keep=None):
+    path = keep or tempfile.mkdtemp(prefix="devmetrics-bench-")
+    try:
+        started = time.perf_counter()
+        generate_repository(path, commits, files, authors, lines, seed)
+        generation = time.perf_counter() - started
+        return {
+            "repository": path if keep else None,
+            "commits": commits,
+            "files": files,
+            "authors": authors,
+            "lines": lines,
+            "generation_seconds": generation,
+            "stages": run_benchmark(path, workers),
+            "children_peak_mb": children_peak_mb(),
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def format_benchmark(report):
+    lines = [
+        f"Синтетический репозиторий: {report['commits']} коммитов, {report['files']} файлов, "
+        f"{report['authors']} авторов, ~{report['lines']} строк в файле "
+        f"(создан за {report['generation_seconds']:.2f} с)",
+        f"{'Этап':<32}{'Время, с':>10}{'Объектов':>10}{'Объектов/с':>14}{'Пик Python, МБ':>16}",
+    ]
+    for row in report["stages"]:
+        items = "" if row["items"] is None else str(row["items"])
+        throughput = "" if row["throughput"] is None else f"{row['throughput']:.0f}"
+        lines.append(f"{row['stage']:<32}{row['seconds']:>10.3f}{items:>10}{throughput:>14}"
+                     f"{row['python_peak_mb']:>16.1f}")
+    lines.append(f"Пик памяти дочерних процессов за весь запуск: {report['children_peak_mb']:.1f} МБ")
+    return "\n".join(lines)
@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+
+
+class StatsCache:
+    BATCH_SIZE = 500
+    TIMEOUT = 30
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=self.TIMEOUT)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            self.connection.executescript("""
+                DROP TABLE IF EXISTS commits;
+                DROP TABLE IF EXISTS commit_files;
+            """)
+            self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS commits (
+                sha TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS commit_files (
+                sha TEXT NOT NULL,
+                path TEXT NOT NULL,
+                insertions INTEGER NOT NULL,
+                deletions INTEGER NOT NULL,
+                old_path TEXT
+            );
+            CREATE INDEX IF NOT EXISTS commit_files_sha ON commit_files (sha);
+        """)
+
+    def get_many(self, shas):
+        stats = {}
+        shas = list(shas)
+        for start in range(0, len(shas), self.BATCH_SIZE):
+            batch = shas[start:start + self.BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            for (sha,) in self.connection.execute(
+                    f"SELECT sha FROM commits WHERE sha IN ({placeholders})", batch):
+                stats[sha] = []
+            for sha, path, insertions, deletions, old_path in self.connection.execute(
+                    f"SELECT sha, path, insertions, deletions, old_path FROM commit_files "
+                    f"WHERE sha IN ({placeholders}) ORDER BY rowid", batch):
+                stats[sha].append((path, insertions, deletions, old_path))
+        return stats
+
+    def put_many(self, stats):
+        if not stats:
+            return
+        with self.connection:
+            for sha, files in stats.items():
+                cursor = self.connection.execute("INSERT OR IGNORE INTO commits (sha) VALUES (?)", (sha,))
+                if cursor.rowcount:
+                    self.connection.executemany(
+                        "INSERT INTO commit_files (sha, path, insertions, deletions, old_path) "
+                        "VALUES (?, ?, ?, ?, ?)", [(sha, *file) for file in files])
+
+    def close(self):
+        self.connection.close()
+
+
+class ComplexityIndex:
+    TIMEOUT = 30
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=self.TIMEOUT)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                project TEXT NOT NULL,
+                path TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                blocks TEXT NOT NULL,
+                PRIMARY KEY (project, path)
+            );
+        """)
+
+    def load(self, project):
+        return {path: (mtime_ns, size, [tuple(block) for block in json.loads(blocks)])
+                for path, mtime_ns, size, blocks in self.connection.execute(
+                    "SELECT path, mtime_ns, size, blocks FROM files WHERE project = ?", (project,))}
+
+    def update(self, project, entries, stale_paths=()):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO files (project, path, mtime_ns, size, blocks) VALUES (?, ?, ?, ?, ?)",
+                [(project, path, mtime_ns, size, json.dumps(blocks))
+                 for path, (mtime_ns, size, blocks) in entries.items()])
+            self.connection.executemany("DELETE FROM files WHERE project = ? AND path = ?",
+                                        [(project, path) for path in stale_paths])
+
+    def close(self):
+        self.connection.close()
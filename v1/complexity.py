@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from radon.complexity import cc_visit
+from history import check_cancelled
+from diagnostics import stage, count
+
+
+CHUNK_SIZE = 32
+PARALLEL_THRESHOLD = 64
+
+
+def file_blocks(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        code = f.read()
+    return [(block.fullname, block.lineno, block.complexity) for block in cc_visit(code)]
+
+
+def file_complexity(blocks):
+    return sum(complexity for _, _, complexity in blocks)
+
+
+def scan_chunk(paths):
+    results = []
+    for path in paths:
+        try:
+            results.append((path, file_blocks(path)))
+        except (SyntaxError, ValueError, OSError):
+            results.append((path, None))
+    return results
+
+
+class WorkerPool:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def get(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+                count("worker processes", self.workers)
+            return self.executor
+
+    def discard(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def scan_complexity(paths, workers=None, cancelled=None, pool=None):
+    paths = list(paths)
+    count("files parsed", len(paths))
+    if pool is not None:
+        workers = pool.workers
+    workers = workers or os.cpu_count() or 1
+    chunks = [paths[start:start + CHUNK_SIZE] for start in range(0, len(paths), CHUNK_SIZE)]
+    results = []
+    if workers == 1 or len(paths) < PARALLEL_THRESHOLD:
+        for chunk in chunks:
+            check_cancelled(cancelled)
+            results.extend(scan_chunk(chunk))
+        return parsed_files(results)
+
+    owned = pool is None
+    if owned:
+        pool = WorkerPool(min(workers, len(chunks)))
+    executor = pool.get()
+    futures = [executor.submit(scan_chunk, chunk) for chunk in chunks]
+    try:
+        for future in futures:
+            check_cancelled(cancelled)
+            results.extend(future.result())
+    except BrokenProcessPool:
+        pool.discard(executor)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+        if owned:
+            pool.shutdown()
+    return parsed_files(results)
+
+
+def parsed_files(results):
+    parsed = [(path, blocks) for path, blocks in results if blocks is not None]
+    count("files failed", len(results) - len(parsed))
+    return parsed
+
+
+def indexed_complexity(project_path, paths, index=None, workers=None, cancelled=None, pool=None):
+    signatures = {}
+    for path in paths:
+        stat = os.stat(path)
+        signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    with stage("code: complexity index"):
+        known = index.load(project_path) if index is not None else {}
+
+    blocks = {}
+    changed = []
+    for path, signature in signatures.items():
+        entry = known.get(path)
+        if entry is not None and entry[:2] == signature:
+            blocks[path] = entry[2]
+        else:
+            changed.append(path)
+
+    count("bytes read", sum(signatures[path][1] for path in changed))
+    with stage("code: radon"):
+        scanned = dict(scan_complexity(changed, workers, cancelled, pool))
+    blocks.update(scanned)
+    if index is not None:
+        with stage("code: complexity index"):
+            index.update(project_path, {path: (*signatures[path], scanned[path]) for path in scanned},
+                         [path for path in known if path not in signatures])
+    return [(path, blocks[path]) for path in signatures if path in blocks]
@@ -0,0 +1,195 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from metrics import analyze_repository, format_time_metrics, format_code_metrics
+from batch import find_repositories, analyze_batch, aggregate_reports
+from benchmark import benchmark, format_benchmark
+from diagnostics import Diagnostics, collecting, save_diagnostics
+from results import json_default, import_results
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"неверная дата '{value}', ожидается ГГГГ-ММ-ДД")
+
+
+def time_window(args):
+    if args.since or args.until:
+        since = int(args.since.timestamp()) if args.since else None
+        until = int((args.until + timedelta(days=1)).timestamp()) - 1 if args.until else None
+        return since, until
+    if args.days:
+        return int((datetime.now() - timedelta(days=args.days)).timestamp()), None
+    return None, None
+
+
+def format_text(report):
+    graph = report["graph"]
+    return (
+        f"Репозиторий: {report['project_path']}\n\n"
+        f"{format_time_metrics(report['time'])}\n\n"
+        f"{format_code_metrics(report['code'])}\n\n"
+        f"Коммитов по неделям: {' '.join(str(count) for count in graph['commits_per_week'])}"
+    )
+
+
+def add_window_arguments(parser):
+    parser.add_argument("--since", type=parse_date, help="начало периода, ГГГГ-ММ-ДД")
+    parser.add_argument("--until", type=parse_date, help="конец периода включительно, ГГГГ-ММ-ДД")
+    parser.add_argument("--days", type=int, help="анализировать последние N дней")
+    parser.add_argument("--max-count", type=int, help="ограничить число коммитов")
+    parser.add_argument("--idle-gap", type=int, default=120,
+                        help="перерыв между коммитами в минутах, после которого начинается новая сессия")
+    parser.add_argument("--cache-dir", help="каталог для кэша статистики и индекса сложности")
+
+
+def command_analyze(args):
+    since, until = time_window(args)
+    diagnostics = Diagnostics(args.profile)
+    try:
+        with collecting(diagnostics):
+            report = analyze_repository(args.repository, since, until, args.max_count, args.cache_dir,
+                                        args.workers, args.idle_gap * 60, args.export)
+    except Exception as e:
+        diagnostics.error("analyze", e)
+        print(f"Ошибка при анализе репозитория: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if args.diagnostics:
+            save_diagnostics(diagnostics.report(), args.diagnostics)
+    if args.format == "json":
+        json.dump(report, sys.stdout, default=json_default, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_text(report))
+    return 0
+
+
+def command_show(args):
+    try:
+        report = import_results(args.results)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка при загрузке результатов: {str(e)}", file=sys.stderr)
+        return 1
+    report.pop("history")
+    if args.format == "json":
+        json.dump(report, sys.stdout, default=json_default, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_text(report))
+    return 0
+
+
+def format_batch_text(batch_report):
+    lines = []
+    for row in batch_report["repositories"]:
+        if row["error"]:
+            lines.append(f"{row['project_path']}: ошибка: {row['error']}")
+        else:
+            lines.append(f"{row['project_path']}: коммитов {row['commits']}, +{row['added_lines']} "
+                         f"-{row['deleted_lines']}, средняя сложность {row['avg_cc']:.2f}")
+    summary = batch_report["summary"]
+    lines += [
+        "",
+        f"Репозиториев: {summary['repositories']} (с ошибками: {summary['failed']})",
+        f"Коммитов: {summary['commits']}",
+        f"Добавлено строк: {summary['added_lines']}",
+        f"Удалено строк: {summary['deleted_lines']}",
+        f"Средняя цикломатическая сложность: {summary['avg_cc']:.2f}",
+        "Кандидаты на рефакторинг:",
+    ]
+    lines += [f"{hotspot['path']}: оценка {hotspot['score']:.1f} (сложность {hotspot['complexity']}, "
+              f"изменений {hotspot['changes']})" for hotspot in summary["refactoring_candidates"]]
+    return "\n".join(lines)
+
+
+def command_batch(args):
+    paths = list(args.paths)
+    if args.from_file:
+        with open(args.from_file, 'r', encoding='utf-8') as f:
+            paths += [line.strip() for line in f if line.strip()]
+    repositories = find_repositories(paths)
+    if not repositories:
+        print("Не найдено ни одного Git-репозитория", file=sys.stderr)
+        return 1
+
+    since, until = time_window(args)
+    done = 0
+
+    def report_progress(project_path, report, error):
+        nonlocal done
+        done += 1
+        status = "ошибка" if error else "готово"
+        print(f"[{done}/{len(repositories)}] {project_path}: {status}", file=sys.stderr)
+
+    results = analyze_batch(repositories, since, until, args.max_count, args.cache_dir, args.idle_gap * 60,
+                            args.jobs, report_progress)
+    batch_report = aggregate_reports(results)
+    if args.format == "json":
+        json.dump(batch_report, sys.stdout, default=json_default, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_batch_text(batch_report))
+    return 0 if batch_report["summary"]["failed"] < len(results) else 1
+
+
+def command_bench(args):
+    report = benchmark(args.commits, args.files, args.authors, args.lines, args.seed, args.workers, args.keep)
+    if args.format == "json":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_benchmark(report))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="devmetrics", description="Анализатор продуктивности без графического интерфейса")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="проанализировать один репозиторий")
+    analyze.add_argument("repository", help="путь к Git-репозиторию")
+    analyze.add_argument("--format", choices=("text", "json"), default="text")
+    analyze.add_argument("--workers", type=int, help="число процессов для анализа сложности")
+    analyze.add_argument("--diagnostics", help="сохранить замеры этапов, счётчики и ошибки в JSON-файл")
+    analyze.add_argument("--profile", action="store_true", help="добавить в диагностику профиль cProfile")
+    analyze.add_argument("--export", help="сохранить результаты в каталог в колоночном формате (.npy)")
+    add_window_arguments(analyze)
+    analyze.set_defaults(handler=command_analyze)
+
+    show = commands.add_parser("show", help="показать результаты, сохранённые через analyze --export")
+    show.add_argument("results", help="каталог с сохранёнными результатами")
+    show.add_argument("--format", choices=("text", "json"), default="text")
+    show.set_defaults(handler=command_show)
+
+    batch = commands.add_parser("batch", help="проанализировать несколько репозиториев параллельно")
+    batch.add_argument("paths", nargs="*", help="репозитории или каталоги, содержащие репозитории")
+    batch.add_argument("--from-file", help="файл со списком путей, по одному на строку")
+    batch.add_argument("--jobs", type=int, help="число параллельно анализируемых репозиториев")
+    batch.add_argument("--format", choices=("text", "json"), default="text")
+    add_window_arguments(batch)
+    batch.set_defaults(handler=command_batch)
+
+    bench = commands.add_parser("bench", help="замерить этапы анализа на синтетическом репозитории")
+    bench.add_argument("--commits", type=int, default=1000, help="число коммитов")
+    bench.add_argument("--files", type=int, default=200, help="число Python-файлов")
+    bench.add_argument("--authors", type=int, default=10, help="число авторов")
+    bench.add_argument("--lines", type=int, default=200, help="средний размер файла в строках")
+    bench.add_argument("--seed", type=int, default=0, help="зерно генератора случайных чисел")
+    bench.add_argument("--workers", type=int, help="число процессов для анализа сложности")
+    bench.add_argument("--keep", help="создать репозиторий в этом каталоге и не удалять его")
+    bench.add_argument("--format", choices=("text", "json"), default="text")
+    bench.set_defaults(handler=command_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
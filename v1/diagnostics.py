@@ -0,0 +1,137 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+
+PROFILE_LINES = 40
+
+active = threading.local()
+
+
+class Diagnostics:
+    def __init__(self, profile=False):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.counters = Counter()
+        self.errors = []
+        self.profile = profile
+        self.profiler = None
+        self.profile_text = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += 1
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def error(self, stage, exc):
+        with self.lock:
+            self.errors.append({
+                "stage": stage,
+                "error": str(exc),
+                "traceback": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+            })
+
+    def start_profile(self):
+        if not self.profile:
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            self.profile_text = f"Профилирование недоступно: {str(e)}"
+            return
+        self.profiler = profiler
+
+    def stop_profile(self):
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        self.profile_text = output.getvalue()
+        self.profiler = None
+
+    def report(self):
+        with self.lock:
+            return {
+                "started": self.started,
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters),
+                "errors": list(self.errors),
+                "profile": self.profile_text,
+            }
+
+
+@contextmanager
+def collecting(diagnostics):
+    previous = getattr(active, "diagnostics", None)
+    active.diagnostics = diagnostics
+    diagnostics.start_profile()
+    try:
+        yield diagnostics
+    finally:
+        diagnostics.stop_profile()
+        active.diagnostics = previous
+
+
+def current():
+    return getattr(active, "diagnostics", None)
+
+
+@contextmanager
+def stage(name):
+    diagnostics = current()
+    if diagnostics is None:
+        yield
+        return
+    with diagnostics.stage(name):
+        yield
+
+
+def count(name, value=1):
+    diagnostics = current()
+    if diagnostics is not None:
+        diagnostics.count(name, value)
+
+
+def format_diagnostics(report):
+    if report is None:
+        return "Анализ ещё не запускался"
+    lines = [f"Запуск: {time.strftime('%d.%m.%Y %H:%M:%S', time.localtime(report['started']))}", "",
+             f"{'Этап':<32}{'Время, с':>10}{'Вызовов':>10}"]
+    for name, row in sorted(report["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True):
+        lines.append(f"{name:<32}{row['seconds']:>10.3f}{row['calls']:>10}")
+    lines += ["", "Счётчики:"]
+    lines += [f"{name}: {value}" for name, value in sorted(report["counters"].items())]
+    if report["errors"]:
+        lines += ["", "Ошибки:"]
+        lines += [f"[{error['stage']}] {error['traceback']}" for error in report["errors"]]
+    if report["profile"]:
+        lines += ["", "Профиль (cProfile):", report["profile"]]
+    return "\n".join(lines)
+
+
+def save_diagnostics(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
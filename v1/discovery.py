@@ -0,0 +1,65 @@
+import os
+import subprocess
+from diagnostics import count
+
+
+PROJECT_FILE_SUFFIXES = ('.py', '.js', '.java', '.cs', '.cpp', '.h', '.go', '.rs', '.kt', '.swift',
+                         '.json', '.yaml', '.yml', '.toml', '.env', 'Dockerfile', '.dockerignore',
+                         '.md', '.rst', 'README.md', 'LICENSE', 'CHANGELOG.md', 'CONTRIBUTING.md',
+                         'CODESTYLE.md', 'package.json', 'requirements.txt', 'pom.xml', 'build.gradle',
+                         'Cargo.toml', '.csproj', '.sln', '.css', '.scss', '.png', '.jpg', '.svg', '.html')
+IGNORED_DIRS = {'.git', '.hg', '.svn', 'node_modules', 'venv', '.venv', 'env', '__pycache__', '.tox', '.nox',
+                '.mypy_cache', '.pytest_cache', '.idea', '.vscode', 'build', 'dist', 'target', 'site-packages'}
+READ_SIZE = 1 << 16
+
+
+def iter_project_files(project_path, suffixes=PROJECT_FILE_SUFFIXES):
+    files = iter_git_files(project_path, suffixes)
+    try:
+        first = next(files)
+    except StopIteration:
+        return
+    except (OSError, subprocess.SubprocessError):
+        yield from iter_tree_files(project_path, suffixes)
+        return
+    yield first
+    yield from files
+
+
+def iter_git_files(project_path, suffixes):
+    count("subprocesses")
+    process = subprocess.Popen(["git", "-C", project_path, "ls-files", "-z", "--cached", "--others",
+                                "--exclude-standard"],
+                               stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        buffer = b""
+        for chunk in iter(lambda: process.stdout.read(READ_SIZE), b""):
+            count("bytes read", len(chunk))
+            buffer += chunk
+            names = buffer.split(b"\0")
+            buffer = names.pop()
+            for name in names:
+                name = os.fsdecode(name)
+                if name.endswith(suffixes):
+                    path = os.path.join(project_path, name)
+                    if os.path.isfile(path):
+                        yield path
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+
+def iter_tree_files(project_path, suffixes):
+    stack = [project_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith(suffixes) and entry.is_file():
+                    yield entry.path
@@ -0,0 +1,363 @@
+import subprocess
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from diagnostics import stage, count
+
+
+LOG_FORMAT = "%x1e%H%x1f%an%x1f%cd%x1f%ad%x1f%P"
+READ_SIZE = 1 << 16
+
+LogRecord = namedtuple("LogRecord", "sha author committed_date tz_offset authored_date author_tz_offset parent_count files")
+
+
+class GitError(Exception):
+    pass
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+class CommitHistory:
+    def __init__(self, project_path, since=None, until=None):
+        self.project_path = project_path
+        self.since = since
+        self.until = until
+        self.shas = []
+        self.author_names = []
+        self.author_ids = np.zeros(0, dtype=np.int32)
+        self.committed_dates = np.zeros(0, dtype=np.int64)
+        self.tz_offsets = np.zeros(0, dtype=np.int32)
+        self.authored_dates = np.zeros(0, dtype=np.int64)
+        self.author_tz_offsets = np.zeros(0, dtype=np.int32)
+        self.parent_counts = np.zeros(0, dtype=np.int8)
+        self.file_paths = []
+        self.file_commits = np.zeros(0, dtype=np.int32)
+        self.file_ids = np.zeros(0, dtype=np.int32)
+        self.file_insertions = np.zeros(0, dtype=np.int32)
+        self.file_deletions = np.zeros(0, dtype=np.int32)
+        self.file_old_ids = np.zeros(0, dtype=np.int32)
+        self.local_dates_cache = None
+
+    def __len__(self):
+        return len(self.shas)
+
+    def local_dates(self):
+        if self.local_dates_cache is None:
+            self.local_dates_cache = to_local_time(self.committed_dates)
+        return self.local_dates_cache
+
+    def total_insertions(self):
+        return int(self.file_insertions.sum())
+
+    def total_deletions(self):
+        return int(self.file_deletions.sum())
+
+    def file_change_counts(self):
+        counts = np.bincount(self.file_ids, minlength=len(self.file_paths))
+        return {path: count for path, count in zip(self.file_paths, counts.tolist()) if count}
+
+
+def local_offset(timestamp):
+    return time.localtime(timestamp).tm_gmtoff
+
+
+def to_local_time(timestamps):
+    hours, inverse = np.unique(timestamps // 3600, return_inverse=True)
+    offsets = np.array([local_offset(int(hour) * 3600) for hour in hours.tolist()], dtype=np.int64)
+    return timestamps + offsets[inverse.reshape(-1)]
+
+
+class HistoryBuilder:
+    def __init__(self, project_path, since=None, until=None):
+        self.history = CommitHistory(project_path, since, until)
+        self.author_index = {}
+        self.path_index = {}
+        self.author_ids = []
+        self.committed_dates = []
+        self.tz_offsets = []
+        self.authored_dates = []
+        self.author_tz_offsets = []
+        self.parent_counts = []
+        self.file_commits = []
+        self.file_ids = []
+        self.file_insertions = []
+        self.file_deletions = []
+        self.file_old_ids = []
+
+    def add_commit(self, sha, author, committed_date, tz_offset, authored_date, author_tz_offset, parent_count):
+        author_id = self.author_index.get(author)
+        if author_id is None:
+            author_id = self.author_index[author] = len(self.history.author_names)
+            self.history.author_names.append(author)
+        self.history.shas.append(sha)
+        self.author_ids.append(author_id)
+        self.committed_dates.append(committed_date)
+        self.tz_offsets.append(tz_offset)
+        self.authored_dates.append(authored_date)
+        self.author_tz_offsets.append(author_tz_offset)
+        self.parent_counts.append(parent_count)
+        return len(self.history.shas) - 1
+
+    def path_id(self, path):
+        file_id = self.path_index.get(path)
+        if file_id is None:
+            file_id = self.path_index[path] = len(self.history.file_paths)
+            self.history.file_paths.append(path)
+        return file_id
+
+    def add_file(self, commit_index, path, insertions, deletions, old_path=None):
+        self.file_commits.append(commit_index)
+        self.file_ids.append(self.path_id(path))
+        self.file_insertions.append(insertions)
+        self.file_deletions.append(deletions)
+        self.file_old_ids.append(-1 if old_path is None else self.path_id(old_path))
+
+    def build(self):
+        history = self.history
+        history.author_ids = np.array(self.author_ids, dtype=np.int32)
+        history.committed_dates = np.array(self.committed_dates, dtype=np.int64)
+        history.tz_offsets = np.array(self.tz_offsets, dtype=np.int32)
+        history.authored_dates = np.array(self.authored_dates, dtype=np.int64)
+        history.author_tz_offsets = np.array(self.author_tz_offsets, dtype=np.int32)
+        history.parent_counts = np.array(self.parent_counts, dtype=np.int8)
+        history.file_commits = np.array(self.file_commits, dtype=np.int32)
+        history.file_ids = np.array(self.file_ids, dtype=np.int32)
+        history.file_insertions = np.array(self.file_insertions, dtype=np.int32)
+        history.file_deletions = np.array(self.file_deletions, dtype=np.int32)
+        history.file_old_ids = np.array(self.file_old_ids, dtype=np.int32)
+        return history
+
+
+def parse_tz_offset(value):
+    sign = -1 if value.startswith("-") else 1
+    return sign * (int(value[1:3]) * 3600 + int(value[3:5]) * 60)
+
+
+def parse_date(value):
+    timestamp, tz = value.split(" ")
+    return int(timestamp), parse_tz_offset(tz)
+
+
+def parse_header(token):
+    sha, author, committed, authored, parents = token.decode("utf-8", "replace").split("\x1f")
+    return LogRecord(sha, author, *parse_date(committed), *parse_date(authored), len(parents.split()), [])
+
+
+def parse_count(value):
+    return 0 if value == b"-" else int(value)
+
+
+def parse_log_stream(chunks):
+    record = None
+    rename = None
+    buffer = b""
+    for chunk in chunks:
+        count("bytes read", len(chunk))
+        buffer += chunk
+        tokens = buffer.split(b"\0")
+        buffer = tokens.pop()
+        for token in tokens:
+            if rename is not None:
+                rename.append(token.decode("utf-8", "replace"))
+                if len(rename) == 4:
+                    insertions, deletions, old_path, path = rename
+                    record.files.append((path, insertions, deletions, old_path))
+                    rename = None
+                continue
+            token = token.lstrip(b"\n")
+            if not token:
+                continue
+            if token.startswith(b"\x1e"):
+                if record is not None:
+                    count("commits read")
+                    yield record
+                record = parse_header(token[1:])
+                continue
+            insertions, deletions, path = token.split(b"\t", 2)
+            if path:
+                record.files.append((path.decode("utf-8", "replace"),
+                                     parse_count(insertions), parse_count(deletions), None))
+            else:
+                rename = [parse_count(insertions), parse_count(deletions)]
+    if record is not None:
+        count("commits read")
+        yield record
+
+
+def iter_log(project_path, args=(), numstat=False, revisions=None):
+    command = ["git", "-C", project_path, "log", "-z", "--date=raw", f"--format={LOG_FORMAT}"]
+    if numstat:
+        command += ["--numstat", "-M", "--diff-merges=first-parent"]
+    if revisions is not None:
+        command += ["--no-walk=unsorted", "--stdin"]
+    command += list(args)
+
+    count("subprocesses")
+    process = subprocess.Popen(command, stdin=subprocess.PIPE if revisions is not None else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        if revisions is not None:
+            process.stdin.write("".join(f"{sha}\n" for sha in revisions).encode())
+            process.stdin.close()
+        yield from parse_log_stream(iter(lambda: process.stdout.read(READ_SIZE), b""))
+        error = process.stderr.read().decode("utf-8", "replace").strip()
+        if process.wait() != 0:
+            raise GitError(error or f"git log завершился с кодом {process.returncode}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def window_args(since=None, until=None, max_count=None):
+    args = []
+    if since is not None:
+        args.append(f"--since=@{since}")
+    if until is not None:
+        args.append(f"--until=@{until}")
+    if max_count:
+        args.append(f"--max-count={max_count}")
+    return args
+
+
+def check_cancelled(cancelled):
+    if cancelled is not None and cancelled.is_set():
+        raise AnalysisCancelled()
+
+
+def head_commit(project_path):
+    count("subprocesses")
+    result = subprocess.run(["git", "-C", project_path, "rev-parse", "--verify", "-q", "HEAD"],
+                            stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode == 1:
+        return None
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode("utf-8", "replace").strip())
+    return result.stdout.decode().strip()
+
+
+def is_ancestor(project_path, ancestor, commit):
+    count("subprocesses")
+    result = subprocess.run(["git", "-C", project_path, "merge-base", "--is-ancestor", ancestor, commit],
+                            stdin=subprocess.DEVNULL, capture_output=True)
+    return result.returncode == 0
+
+
+def load_history(project_path, since=None, until=None, max_count=None, stats_cache=None, cancelled=None,
+                 revision_range=None):
+    builder = HistoryBuilder(project_path, since, until)
+    args = window_args(since, until, max_count)
+    if revision_range:
+        args.append(revision_range)
+    if stats_cache is None:
+        with stage("history: git log --numstat"):
+            for record in iter_log(project_path, args, numstat=True):
+                check_cancelled(cancelled)
+                index = builder.add_commit(*record[:7])
+                for file in record.files:
+                    builder.add_file(index, *file)
+        return builder.build()
+
+    commit_index = {}
+    with stage("history: git log"):
+        for record in iter_log(project_path, args):
+            check_cancelled(cancelled)
+            commit_index[record.sha] = builder.add_commit(*record[:7])
+
+    with stage("history: stats cache"):
+        cached = stats_cache.get_many(commit_index)
+    count("stats cache hits", len(cached))
+    missing = [sha for sha in commit_index if sha not in cached]
+    computed = {}
+    if missing:
+        with stage("history: git log --numstat"):
+            for record in iter_log(project_path, numstat=True, revisions=missing):
+                check_cancelled(cancelled)
+                computed[record.sha] = record.files
+        with stage("history: stats cache"):
+            stats_cache.put_many(computed)
+
+    with stage("history: build"):
+        for stats in (cached, computed):
+            for sha, files in stats.items():
+                for file in files:
+                    builder.add_file(commit_index[sha], *file)
+        return builder.build()
+
+
+def merge_histories(newer, older):
+    history = CommitHistory(older.project_path, newer.since, newer.until)
+    keep = np.ones(len(older), dtype=bool)
+    if newer.since is not None:
+        keep = older.committed_dates >= newer.since
+
+    author_index = {name: index for index, name in enumerate(older.author_names)}
+    author_map = np.array([author_index.setdefault(name, len(author_index)) for name in newer.author_names],
+                          dtype=np.int32)
+    path_index = {path: index for index, path in enumerate(older.file_paths)}
+    path_map = np.array([path_index.setdefault(path, len(path_index)) for path in newer.file_paths],
+                        dtype=np.int32)
+    history.author_names = list(author_index)
+    history.file_paths = list(path_index)
+
+    history.shas = newer.shas + [sha for sha, kept in zip(older.shas, keep.tolist()) if kept]
+    history.author_ids = np.concatenate((author_map[newer.author_ids], older.author_ids[keep]))
+    for column in ("committed_dates", "tz_offsets", "authored_dates", "author_tz_offsets", "parent_counts"):
+        setattr(history, column, np.concatenate((getattr(newer, column), getattr(older, column)[keep])))
+
+    commit_map = np.full(len(older), -1, dtype=np.int32)
+    commit_map[keep] = np.arange(np.count_nonzero(keep), dtype=np.int32) + len(newer)
+    older_commits = commit_map[older.file_commits]
+    rows = older_commits >= 0
+    history.file_commits = np.concatenate((newer.file_commits, older_commits[rows]))
+    history.file_ids = np.concatenate((path_map[newer.file_ids], older.file_ids[rows]))
+    history.file_insertions = np.concatenate((newer.file_insertions, older.file_insertions[rows]))
+    history.file_deletions = np.concatenate((newer.file_deletions, older.file_deletions[rows]))
+    old_path_map = np.append(path_map, np.int32(-1))
+    history.file_old_ids = np.concatenate((old_path_map[newer.file_old_ids], older.file_old_ids[rows]))
+    return history
+
+
+class HistoryStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def load(self, project_path, since=None, until=None, stats_cache=None, cancelled=None):
+        head = head_commit(project_path)
+        if head is None:
+            return CommitHistory(project_path, since, until)
+
+        with self.lock:
+            entry = self.entries.get(project_path)
+        history = None
+        if entry is not None:
+            last_head, last_since, last_until, last_history = entry
+            window_fits = last_until == until and (last_since is None or (since is not None and since >= last_since))
+            if window_fits and last_head == head:
+                count("commits reused", len(last_history))
+                history = merge_histories(CommitHistory(project_path, since, until), last_history)
+            elif window_fits and is_ancestor(project_path, last_head, head):
+                newer = load_history(project_path, since, until, stats_cache=stats_cache, cancelled=cancelled,
+                                     revision_range=f"{last_head}..{head}")
+                count("commits reused", len(last_history))
+                history = merge_histories(newer, last_history)
+        if history is None:
+            history = load_history(project_path, since, until, stats_cache=stats_cache, cancelled=cancelled,
+                                   revision_range=head)
+
+        with self.lock:
+            self.entries[project_path] = (head, since, until, history)
+        return history
+
+    def invalidate(self, project_path=None):
+        with self.lock:
+            if project_path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(project_path, None)
@@ -0,0 +1,67 @@
+import heapq
+import numpy as np
+
+
+DEFAULT_HALF_LIFE = 90 * 86400
+TOP_COUNT = 5
+
+
+def follow_renames(history):
+    file_ids = history.file_ids.copy()
+    renames = np.flatnonzero(history.file_old_ids >= 0)
+    if not len(renames):
+        return file_ids
+
+    order = np.lexsort((history.file_commits, history.file_ids))
+    sorted_ids = history.file_ids[order]
+    sorted_commits = history.file_commits[order]
+    current_names = {}
+    for row in renames[np.argsort(history.file_commits[renames], kind="stable")].tolist():
+        old_id = int(history.file_old_ids[row])
+        new_id = int(history.file_ids[row])
+        target = current_names.get(new_id, new_id)
+        if target == old_id:
+            continue
+        current_names[old_id] = target
+        start, end = np.searchsorted(sorted_ids, [old_id, old_id + 1])
+        first = start + np.searchsorted(sorted_commits[start:end], history.file_commits[row], side="right")
+        file_ids[order[first:end]] = target
+    return file_ids
+
+
+def rank_hotspots(history, complexity=None, now_ts=None, half_life=DEFAULT_HALF_LIFE, count=TOP_COUNT):
+    complexity = complexity or {}
+    if not len(history.file_ids):
+        return {"frequent": [], "candidates": []}
+
+    file_ids = follow_renames(history)
+    paths = len(history.file_paths)
+    commit_dates = history.committed_dates[history.file_commits]
+    if now_ts is None:
+        now_ts = int(history.committed_dates.max())
+    ages = np.maximum(now_ts - commit_dates, 0)
+    weights = np.exp2(-ages / half_life)
+
+    changes = np.bincount(file_ids, minlength=paths)
+    churn = np.bincount(file_ids, history.file_insertions + history.file_deletions, minlength=paths)
+    decayed = np.bincount(file_ids, weights, minlength=paths)
+    file_complexity = np.array([complexity.get(path, 0) for path in history.file_paths], dtype=float)
+    scores = decayed * np.log1p(churn) * (1 + file_complexity)
+
+    def row(file_id):
+        return {
+            "path": history.file_paths[file_id],
+            "changes": int(changes[file_id]),
+            "churn": int(churn[file_id]),
+            "decayed_changes": float(decayed[file_id]),
+            "complexity": int(file_complexity[file_id]),
+            "score": float(scores[file_id]),
+        }
+
+    active = np.flatnonzero(changes).tolist()
+    frequent = heapq.nlargest(count, active, key=lambda file_id: (decayed[file_id], changes[file_id]))
+    candidates = heapq.nlargest(count, active, key=scores.__getitem__)
+    return {
+        "frequent": [row(file_id) for file_id in frequent],
+        "candidates": [row(file_id) for file_id in candidates],
+    }
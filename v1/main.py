@@ -1,25 +1,45 @@
 import sys
 import os
-from datetime import datetime, timedelta
-from git import Repo
-from git.exc import InvalidGitRepositoryError
-from radon.complexity import cc_visit
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget,
                              QPushButton, QTabWidget, QHBoxLayout, QDockWidget,
-                             QDesktopWidget, QLabel, QTextEdit)
-from PyQt5.QtCore import Qt, QRect, QPropertyAnimation, QSettings
-from PyQt5.QtGui import QIcon
+                             QDesktopWidget, QLabel, QTextEdit, QDialog, QFileDialog,
+                             QMessageBox)
+from PyQt5.QtCore import Qt, QRect, QPropertyAnimation, QSettings, QStandardPaths, QThreadPool
+from PyQt5.QtGui import QIcon, QFontDatabase
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import numpy as np
 from settings import SettingsPanel
+from analysis import AnalysisJob
+from history import GitError, HistoryStore, head_commit
+from watcher import RepositoryWatcher
+from complexity import WorkerPool
+from metrics import format_time_metrics, format_code_metrics
+from diagnostics import format_diagnostics, save_diagnostics
+from results import import_results
 
 class DevMetricsApp(QMainWindow):
+    TAB_STAGES = ("time", "code", "graph")
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Анализатор продуктивности")
         self.settings = QSettings("MyCompany", "DevMetricsApp")
+        self.cache_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation),
+                                      "MyCompany", "DevMetricsApp")
+        self.history_store = HistoryStore()
+        self.watcher = RepositoryWatcher(self)
+        self.watcher.refs_changed.connect(self.refresh_metrics)
+        self.watcher.files_changed.connect(self.on_files_changed)
+        self.thread_pool = QThreadPool()
+        self.complexity_pool = WorkerPool()
+        self.analysis_job = None
+        self.job_id = 0
+        self.diagnostics = None
+        self.tab_cache = {}
+        self.imported = None
+        self.displayed = {}
         self.init_ui()
 
     def init_ui(self):
@@ -54,6 +74,8 @@ class DevMetricsApp(QMainWindow):
         top_layout.addWidget(self.menu_btn, alignment=Qt.AlignLeft)
 
         top_layout.addStretch()
+        self.status_label = QLabel()
+        top_layout.addWidget(self.status_label, alignment=Qt.AlignRight)
         self.main_layout.addWidget(top_panel)
 
     def create_tabs(self):
@@ -61,6 +83,7 @@ class DevMetricsApp(QMainWindow):
         self.create_time_tab()
         self.create_code_tab()
         self.create_graph_tab()
+        self.tabs.currentChanged.connect(self.on_tab_changed)
         self.main_layout.addWidget(self.tabs)
 
     def create_time_tab(self):
@@ -109,6 +132,15 @@ class DevMetricsApp(QMainWindow):
         settings_btn.setIcon(QIcon.fromTheme("configure"))
         settings_btn.setText("Настройки")
         settings_btn.clicked.connect(self.toggle_settings)
+        export_btn = QPushButton("Сохранить результаты")
+        export_btn.clicked.connect(self.export_results)
+        menu_layout.addWidget(export_btn)
+        import_btn = QPushButton("Открыть результаты")
+        import_btn.clicked.connect(self.import_results)
+        menu_layout.addWidget(import_btn)
+        diagnostics_btn = QPushButton("Диагностика")
+        diagnostics_btn.clicked.connect(self.show_diagnostics)
+        menu_layout.addWidget(diagnostics_btn)
         menu_layout.addStretch()
         menu_layout.addWidget(settings_btn, alignment=Qt.AlignBottom)
 
@@ -178,206 +210,251 @@ class DevMetricsApp(QMainWindow):
         project_path = self.settings.value("project_path", "")
         self.settings_panel.project_path_input.setText(project_path)
 
+        self.settings_panel.load_analysis_settings(self.settings)
+
         theme = self.settings.value("theme", "Светлая")
         self.settings_panel.theme_selector.setCurrentText(theme)
         self.settings_panel.change_theme(theme)
 
-        self.update_time_metrics()
-        self.update_code_metrics()
-        self.update_graph_metrics()
+        self.refresh_metrics()
+        self.update_watcher()
 
     def closeEvent(self, event):
         self.settings.setValue("project_path", self.settings_panel.project_path_input.text())
         self.settings.setValue("theme", self.settings_panel.theme_selector.currentText())
+        self.settings_panel.save_analysis_settings(self.settings)
+        self.watcher.stop()
+        self.cancel_analysis()
+        self.thread_pool.waitForDone()
+        self.complexity_pool.shutdown()
         event.accept()
 
-    def update_time_metrics(self):
+    def refresh_metrics(self, stages=AnalysisJob.STAGES):
+        for key in [key for key in self.tab_cache if key[0] in stages]:
+            del self.tab_cache[key]
+        self.displayed.clear()
+        self.imported = None
+        job = self.analysis_job
+        if job is None or not any(name in job.stages for name in stages):
+            self.compute_visible_tab()
+            return
+        pending, export_path = (), None
+        if job.context[0] == self.settings_panel.analysis_context():
+            pending, export_path = job.stages, job.export_path
+        self.cancel_analysis()
+        self.compute_visible_tab(pending, export_path)
+
+    def on_tab_changed(self, index):
+        self.compute_visible_tab()
+
+    def compute_visible_tab(self, pending=(), export_path=None):
+        if self.imported is not None:
+            return
         project_path = self.settings_panel.project_path_input.text()
         if not project_path or not os.path.exists(project_path):
-            self.time_metrics.setText("Укажите путь к проекту в настройках")
-            self.time_heatmap.axes.clear()
-            self.time_heatmap.draw()
+            self.cancel_analysis()
+            self.show_error("history", "Укажите путь к проекту в настройках")
             return
-
         if not os.path.exists(os.path.join(project_path, '.git')):
-            self.time_metrics.setText("Ошибка: Указанная папка не является Git-репозиторием")
-            self.time_heatmap.axes.clear()
-            self.time_heatmap.draw()
+            self.cancel_analysis()
+            self.show_error("history", "Ошибка: Указанная папка не является Git-репозиторием")
             return
 
-        try:
-            repo = Repo(project_path)
-            commits = list(repo.iter_commits(max_count=100))
-            if not commits:
-                self.time_metrics.setText("В репозитории нет коммитов")
-                self.time_heatmap.axes.clear()
-                self.time_heatmap.draw()
+        stage = self.TAB_STAGES[self.tabs.currentIndex()]
+        context = self.analysis_context(project_path)
+        metrics = self.tab_cache.get((stage, context))
+        if metrics is not None and self.displayed.get(stage) != context:
+            self.show_metrics(stage, metrics, context)
+
+        stages = {name for name in pending if (name, context) not in self.tab_cache}
+        if metrics is None:
+            stages.add(stage)
+        if not stages:
+            return
+        job = self.analysis_job
+        if job is not None and job.context == context:
+            if stages.issubset(job.stages):
                 return
+            stages.update(job.stages)
+        self.start_analysis(project_path, tuple(name for name in AnalysisJob.STAGES if name in stages), context,
+                            export_path)
 
-            today = datetime.now()
-            week_ago = today - timedelta(days=7)
-            daily_hours = 0
-            weekly_hours = 0
-            session_times = []
-            last_commit_time = None
-
-            for commit in commits:
-                commit_time = datetime.fromtimestamp(commit.committed_date)
-                if commit_time.date() == today.date():
-                    daily_hours += 1 / 60
-                if commit_time >= week_ago:
-                    weekly_hours += 1 / 60
-                if last_commit_time:
-                    session_times.append((last_commit_time - commit_time).total_seconds() / 3600)
-                last_commit_time = commit_time
-
-            avg_session = sum(session_times) / len(session_times) if session_times else 0
-
-            norm_hours = 8
-            overtime = max(0, daily_hours - norm_hours)
-            underwork = max(0, norm_hours - daily_hours)
-
-            metrics_text = (
-                f"Часы кодинга сегодня: {daily_hours:.2f} ч\n"
-                f"Часы кодинга за неделю: {weekly_hours:.2f} ч\n"
-                f"Средняя продолжительность сессии: {avg_session:.2f} ч\n"
-                f"Овертайм: {overtime:.2f} ч\n"
-                f"Недоработка: {underwork:.2f} ч"
-            )
-            self.time_metrics.setText(metrics_text)
-
-            hours = np.zeros((7, 24))
-            for commit in commits:
-                commit_time = datetime.fromtimestamp(commit.committed_date)
-                if commit_time >= week_ago:
-                    day = commit_time.weekday()
-                    hour = commit_time.hour
-                    hours[day, hour] += 1
-
-            self.time_heatmap.axes.clear()
-            self.time_heatmap.axes.imshow(hours, cmap='hot', interpolation='nearest')
-            self.time_heatmap.axes.set_xticks(range(24))
-            self.time_heatmap.axes.set_yticks(range(7))
-            self.time_heatmap.axes.set_yticklabels(['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс'])
-            self.time_heatmap.axes.set_xlabel("Часы")
-            self.time_heatmap.axes.set_ylabel("Дни недели")
-            self.time_heatmap.axes.set_title("Heatmap активности")
-            self.time_heatmap.draw()
-
-        except InvalidGitRepositoryError:
-            self.time_metrics.setText("Ошибка: Указанная папка не является Git-репозиторием")
-            self.time_heatmap.axes.clear()
-            self.time_heatmap.draw()
-        except Exception as e:
-            self.time_metrics.setText(f"Ошибка при анализе репозитория: {str(e)}")
-            self.time_heatmap.axes.clear()
-            self.time_heatmap.draw()
-
-    def update_code_metrics(self):
+    def analysis_context(self, project_path):
+        try:
+            head = head_commit(project_path)
+        except GitError:
+            head = None
+        return self.settings_panel.analysis_context(), head, time.strftime("%Y-%m-%d")
+
+    def start_analysis(self, project_path, stages, context, export_path=None):
+        self.cancel_analysis()
+        since, until = self.settings_panel.time_window()
+        self.job_id += 1
+        self.analysis_job = AnalysisJob(self.job_id, project_path, since, until, self.settings_panel.idle_gap(),
+                                        self.cache_dir, self.history_store, stages,
+                                        self.settings_panel.profile_checkbox.isChecked(), export_path,
+                                        self.complexity_pool, context)
+        self.diagnostics = self.analysis_job.diagnostics
+        self.time_heatmap.diagnostics = self.diagnostics
+        self.trend_graph.diagnostics = self.diagnostics
+        self.analysis_job.signals.progress.connect(self.on_analysis_progress)
+        self.analysis_job.signals.result.connect(self.on_analysis_result)
+        self.analysis_job.signals.failed.connect(self.on_analysis_failed)
+        self.analysis_job.signals.finished.connect(self.on_analysis_finished)
+        self.thread_pool.start(self.analysis_job)
+
+    def export_results(self):
         project_path = self.settings_panel.project_path_input.text()
-        if not project_path or not os.path.exists(project_path):
-            self.code_metrics.setText("Укажите путь к проекту в настройках")
+        if not project_path or not os.path.exists(os.path.join(project_path, '.git')):
+            QMessageBox.warning(self, "Ошибка", "Укажите путь к Git-репозиторию в настройках")
             return
-
-        if not os.path.exists(os.path.join(project_path, '.git')):
-            self.code_metrics.setText("Ошибка: Указанная папка не является Git-репозиторием")
+        path = QFileDialog.getExistingDirectory(self, "Каталог для сохранения результатов")
+        if path:
+            self.imported = None
+            self.start_analysis(project_path, AnalysisJob.STAGES, self.analysis_context(project_path), path)
+
+    def import_results(self):
+        path = QFileDialog.getExistingDirectory(self, "Каталог с сохранёнными результатами")
+        if not path:
             return
-
         try:
-            repo = Repo(project_path)
-            commits = list(repo.iter_commits(max_count=100))
-            added_lines = 0
-            deleted_lines = 0
-            hotspots = {}
-            python_files = [f for f in self.get_project_files(project_path) if f.endswith('.py')]
-
-            for commit in commits:
-                diff = commit.stats.total
-                added_lines += diff['insertions']
-                deleted_lines += diff['deletions']
-                for file in commit.stats.files:
-                    hotspots[file] = hotspots.get(file, 0) + 1
-
-            total_cc = 0
-            complex_files = []
-            for file in python_files:
-                with open(file, 'r', encoding='utf-8') as f:
-                    code = f.read()
-                cc_results = cc_visit(code)
-                file_cc = sum(block.complexity for block in cc_results)
-                total_cc += file_cc
-                if file_cc > 10:
-                    complex_files.append((file, file_cc))
-
-            avg_cc = total_cc / len(python_files) if python_files else 0
-            hotspots_text = "\n".join(f"{file}: {count} изменений" for file, count in sorted(hotspots.items(), key=lambda x: x[1], reverse=True)[:5])
-
-            metrics_text = (
-                f"Добавлено строк: {added_lines}\n"
-                f"Удалено строк: {deleted_lines}\n"
-                f"Средняя цикломатическая сложность: {avg_cc:.2f}\n"
-                f"Сложные файлы:\n" + "\n".join(f"{file}: {cc}" for file, cc in complex_files[:5]) + "\n"
-                f"Часто изменяемые файлы:\n{hotspots_text}\n"
-                f"Рекомендации: Проверить файлы с высокой сложностью для рефакторинга."
-            )
-            self.code_metrics.setText(metrics_text)
-
-        except InvalidGitRepositoryError:
-            self.code_metrics.setText("Ошибка: Указанная папка не является Git-репозиторием")
-        except Exception as e:
-            self.code_metrics.setText(f"Ошибка при анализе кода: {str(e)}")
-
-    def update_graph_metrics(self):
-        project_path = self.settings_panel.project_path_input.text()
-        if not project_path or not os.path.exists(project_path):
-            self.trend_graph.axes.clear()
-            self.trend_graph.draw()
+            report = import_results(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось открыть результаты: {str(e)}")
             return
+        self.cancel_analysis()
+        self.imported = report
+        for tab in AnalysisJob.STAGES:
+            self.show_metrics(tab, report[tab], ("import", path))
+        self.status_label.setText(f"Результаты из {path}")
 
-        if not os.path.exists(os.path.join(project_path, '.git')):
-            self.trend_graph.axes.clear()
-            self.trend_graph.draw()
-            return
+    def update_watcher(self):
+        project_path = self.settings_panel.project_path_input.text()
+        if (self.settings_panel.watch_checkbox.isChecked() and project_path
+                and os.path.exists(os.path.join(project_path, '.git'))):
+            if self.watcher.project_path != project_path:
+                self.watcher.watch(project_path)
+        else:
+            self.watcher.stop()
 
+    def on_files_changed(self):
+        self.refresh_metrics(("code",))
+
+    def cancel_analysis(self):
+        if self.analysis_job is not None:
+            self.analysis_job.cancel()
+            self.analysis_job = None
+            self.job_id += 1
+            self.status_label.clear()
+
+    def on_analysis_progress(self, job_id, message):
+        if job_id == self.job_id:
+            self.status_label.setText(message)
+
+    def on_analysis_result(self, job_id, tab, metrics):
+        if job_id != self.job_id or self.analysis_job is None:
+            return
+        if tab == "export":
+            QMessageBox.information(self, "Сохранение результатов", f"Результаты сохранены в {metrics}")
+            return
+        context = self.analysis_job.context
+        for key in [key for key in self.tab_cache if key[0] == tab and key[1][0] == context[0]]:
+            del self.tab_cache[key]
+        self.tab_cache[(tab, context)] = metrics
+        self.show_metrics(tab, metrics, context)
+
+    def show_metrics(self, tab, metrics, context):
+        self.displayed[tab] = context
+        if tab == "time":
+            self.update_time_metrics(metrics)
+        elif tab == "code":
+            self.update_code_metrics(metrics)
+        elif tab == "graph":
+            self.update_graph_metrics(metrics)
+
+    def on_analysis_failed(self, job_id, tab, message):
+        if job_id != self.job_id:
+            return
+        if tab == "export":
+            QMessageBox.warning(self, "Ошибка", message)
+        else:
+            self.show_error(tab, message)
+
+    def on_analysis_finished(self, job_id):
+        if job_id == self.job_id:
+            self.analysis_job = None
+            self.status_label.clear()
+
+    def show_diagnostics(self):
+        report = self.diagnostics.report() if self.diagnostics is not None else None
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Диагностика последнего анализа")
+        dialog.resize(800, 600)
+        layout = QVBoxLayout(dialog)
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        text.setPlainText(format_diagnostics(report))
+        layout.addWidget(text)
+        save_btn = QPushButton("Сохранить JSON")
+        save_btn.setEnabled(report is not None)
+        save_btn.clicked.connect(lambda: self.save_diagnostics_report(report))
+        layout.addWidget(save_btn, alignment=Qt.AlignRight)
+        dialog.exec_()
+
+    def save_diagnostics_report(self, report):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить диагностику", "diagnostics.json", "JSON (*.json)")
+        if not path:
+            return
         try:
-            repo = Repo(project_path)
-            commits = list(repo.iter_commits(max_count=100))
-            weeks = 4
-            commits_per_week = [0] * weeks
-            today = datetime.now()
-            for commit in commits:
-                commit_time = datetime.fromtimestamp(commit.committed_date)
-                weeks_ago = (today - commit_time).days // 7
-                if weeks_ago < weeks:
-                    commits_per_week[weeks_ago] += 1
-
-            self.trend_graph.axes.clear()
-            self.trend_graph.axes.plot(range(weeks), commits_per_week[::-1], marker='o')
-            self.trend_graph.axes.set_xticks(range(weeks))
-            self.trend_graph.axes.set_xticklabels([f"Неделя {i+1}" for i in range(weeks)])
-            self.trend_graph.axes.set_xlabel("Недели")
-            self.trend_graph.axes.set_ylabel("Количество коммитов")
-            self.trend_graph.axes.set_title("Тренд продуктивности")
-            self.trend_graph.draw()
-
-        except InvalidGitRepositoryError:
-            self.trend_graph.axes.clear()
-            self.trend_graph.draw()
-        except Exception as e:
-            self.trend_graph.axes.clear()
-            self.trend_graph.draw()
-
-    def get_project_files(self, project_path):
-        files = []
-        for root, _, filenames in os.walk(project_path):
-            for filename in filenames:
-                if filename.endswith(('.py', '.js', '.java', '.cs', '.cpp', '.h', '.go', '.rs', '.kt', '.swift',
-                                      '.json', '.yaml', '.yml', '.toml', '.env', 'Dockerfile', '.dockerignore',
-                                      '.md', '.rst', 'README.md', 'LICENSE', 'CHANGELOG.md', 'CONTRIBUTING.md',
-                                      'CODESTYLE.md', 'package.json', 'requirements.txt', 'pom.xml', 'build.gradle',
-                                      'Cargo.toml', '.csproj', '.sln', '.css', '.scss', '.png', '.jpg', '.svg', '.html')):
-                    files.append(os.path.join(root, filename))
-        return files
+            save_diagnostics(report, path)
+        except OSError as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить диагностику: {str(e)}")
+
+    def show_error(self, tab, message):
+        if tab == "history":
+            self.displayed.clear()
+        else:
+            self.displayed.pop(tab, None)
+        if tab in ("history", "time"):
+            self.time_metrics.setText(message)
+            self.time_heatmap.clear_plot()
+        if tab in ("history", "code"):
+            self.code_metrics.setText(message)
+        if tab in ("history", "graph"):
+            self.trend_graph.clear_plot()
+
+    def update_time_metrics(self, metrics):
+        self.time_metrics.setText(format_time_metrics(metrics))
+        if not metrics["commits"]:
+            self.time_heatmap.clear_plot()
+            return
+        self.time_heatmap.show_image(metrics["heatmap"], self.setup_heatmap_axes)
+
+    def setup_heatmap_axes(self, axes):
+        axes.set_xticks(range(24))
+        axes.set_yticks(range(7))
+        axes.set_yticklabels(['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс'])
+        axes.set_xlabel("Часы")
+        axes.set_ylabel("Дни недели")
+        axes.set_title("Heatmap активности")
+
+    def update_code_metrics(self, metrics):
+        self.code_metrics.setText(format_code_metrics(metrics))
+
+    def update_graph_metrics(self, metrics):
+        self.trend_graph.show_line(metrics["commits_per_week"], self.setup_trend_axes)
+
+    def setup_trend_axes(self, axes):
+        weeks = len(self.trend_graph.line.get_ydata())
+        step = max(1, weeks // 12)
+        if weeks <= 52:
+            self.trend_graph.line.set_marker('o')
+        axes.set_xticks(range(0, weeks, step))
+        axes.set_xticklabels([f"Неделя {i+1}" for i in range(0, weeks, step)])
+        axes.set_xlabel("Недели")
+        axes.set_ylabel("Количество коммитов")
+        axes.set_title("Тренд продуктивности")
 
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -385,11 +462,73 @@ class MplCanvas(FigureCanvas):
         self.axes = fig.add_subplot(111)
         super().__init__(fig)
         self.setParent(parent)
-
-
-
-
-
+        self.image = None
+        self.line = None
+        self.background = None
+        self.diagnostics = None
+        self.mpl_connect("draw_event", self.on_draw)
+
+    def animated_artists(self):
+        return [artist for artist in (self.image, self.line) if artist is not None]
+
+    def draw(self):
+        started = time.perf_counter()
+        super().draw()
+        if self.diagnostics is not None:
+            self.diagnostics.add_time("render: draw", time.perf_counter() - started)
+
+    def on_draw(self, event):
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        for artist in self.animated_artists():
+            self.axes.draw_artist(artist)
+
+    def blit_artists(self):
+        if self.background is None:
+            self.draw_idle()
+            return
+        started = time.perf_counter()
+        self.restore_region(self.background)
+        for artist in self.animated_artists():
+            self.axes.draw_artist(artist)
+        self.blit(self.figure.bbox)
+        if self.diagnostics is not None:
+            self.diagnostics.add_time("render: blit", time.perf_counter() - started)
+
+    def clear_plot(self):
+        self.axes.clear()
+        self.image = None
+        self.line = None
+        self.background = None
+        self.draw_idle()
+
+    def show_image(self, data, setup_axes):
+        if self.image is None or self.image.get_array().shape != data.shape:
+            self.axes.clear()
+            self.line = None
+            self.image = self.axes.imshow(data, cmap='hot', interpolation='nearest', animated=True)
+            setup_axes(self.axes)
+            self.draw_idle()
+            return
+        self.image.set_data(data)
+        self.image.set_clim(data.min(), data.max())
+        self.blit_artists()
+
+    def show_line(self, values, setup_axes):
+        if self.line is None or len(self.line.get_ydata()) != len(values):
+            self.axes.clear()
+            self.image = None
+            self.line, = self.axes.plot(range(len(values)), values, animated=True)
+            setup_axes(self.axes)
+            self.draw_idle()
+            return
+        limits = self.axes.get_ylim()
+        self.line.set_ydata(values)
+        self.axes.relim()
+        self.axes.autoscale_view(scalex=False)
+        if self.axes.get_ylim() != limits:
+            self.draw_idle()
+        else:
+            self.blit_artists()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+import os
+from datetime import datetime
+import numpy as np
+from cache import StatsCache, ComplexityIndex
+from history import CommitHistory, head_commit, load_history, local_offset
+from complexity import indexed_complexity, file_complexity
+from discovery import iter_project_files
+from sessions import DAY, WEEK, DEFAULT_IDLE_GAP, detect_sessions, author_workload
+from hotspots import rank_hotspots
+from diagnostics import stage, count
+from results import export_results
+
+
+def local_now(now=None):
+    timestamp = int((now or datetime.now()).timestamp())
+    return timestamp, timestamp + local_offset(timestamp)
+
+
+def compute_time_metrics(history, now=None, idle_gap=DEFAULT_IDLE_GAP):
+    now_ts = local_now(now)[0]
+    local_dates = history.local_dates()
+    week_mask = history.committed_dates >= now_ts - WEEK
+
+    sessions = detect_sessions(history, idle_gap)
+    authors = author_workload(history, sessions, now_ts)
+    avg_session = float(sessions.durations.mean()) / 3600 if len(sessions) else 0
+
+    week_days = (local_dates[week_mask] // DAY + 3) % 7
+    week_hours = local_dates[week_mask] % DAY // 3600
+    hours = np.bincount(week_days * 24 + week_hours, minlength=7 * 24).reshape(7, 24).astype(float)
+
+    return {
+        "commits": len(history),
+        "daily_hours": sum(author["daily_hours"] for author in authors),
+        "weekly_hours": sum(author["weekly_hours"] for author in authors),
+        "avg_session": avg_session,
+        "overtime": sum(author["overtime"] for author in authors),
+        "underwork": sum(author["underwork"] for author in authors),
+        "authors": authors,
+        "heatmap": hours,
+    }
+
+
+def compute_graph_metrics(history, now=None):
+    if history.until is not None:
+        now = datetime.fromtimestamp(history.until)
+    now_ts, now_local = local_now(now)
+    start = history.since
+    if start is None and len(history):
+        start = int(history.committed_dates.min())
+    weeks = 4
+    if start is not None:
+        weeks = max(weeks, (now_local - start - local_offset(start)) // DAY // 7 + 1)
+
+    weeks_ago = (now_local - history.local_dates()) // DAY // 7
+    weeks_ago = weeks_ago[(weeks_ago >= 0) & (weeks_ago < weeks)]
+    commits_per_week = np.bincount(weeks_ago, minlength=weeks)
+
+    return {
+        "weeks": int(weeks),
+        "commits_per_week": commits_per_week[::-1].tolist(),
+    }
+
+
+def compute_code_metrics(history, complexity_index=None, workers=None, cancelled=None, pool=None):
+    with stage("code: discovery"):
+        python_files = list(iter_project_files(history.project_path, ('.py',)))
+    count("files discovered", len(python_files))
+
+    total_cc = 0
+    complex_files = []
+    complexity = {}
+    for file, blocks in indexed_complexity(history.project_path, python_files, complexity_index,
+                                           workers, cancelled, pool):
+        file_cc = file_complexity(blocks)
+        total_cc += file_cc
+        complexity[os.path.relpath(file, history.project_path).replace(os.sep, "/")] = file_cc
+        if file_cc > 10:
+            complex_files.append((file, file_cc))
+
+    now_ts = history.until if history.until is not None else local_now()[0]
+    with stage("code: hotspots"):
+        hotspots = rank_hotspots(history, complexity, now_ts)
+
+    return {
+        "added_lines": history.total_insertions(),
+        "deleted_lines": history.total_deletions(),
+        "python_files": len(python_files),
+        "total_cc": total_cc,
+        "avg_cc": total_cc / len(complexity) if complexity else 0,
+        "complex_files": complex_files[:5],
+        "hotspots": hotspots["frequent"],
+        "refactoring_candidates": hotspots["candidates"],
+        "file_complexity": complexity,
+    }
+
+
+def format_time_metrics(metrics):
+    if not metrics["commits"]:
+        return "В репозитории нет коммитов"
+    authors_text = "\n".join(
+        f"{author['author']}: сегодня {author['daily_hours']:.2f} ч, за неделю {author['weekly_hours']:.2f} ч, "
+        f"сессий {author['sessions']}, средняя сессия {author['avg_session']:.2f} ч, "
+        f"овертайм {author['overtime']:.2f} ч, недоработка {author['underwork']:.2f} ч"
+        for author in metrics["authors"][:10]
+    )
+    return (
+        f"Часы кодинга сегодня: {metrics['daily_hours']:.2f} ч\n"
+        f"Часы кодинга за неделю: {metrics['weekly_hours']:.2f} ч\n"
+        f"Средняя продолжительность сессии: {metrics['avg_session']:.2f} ч\n"
+        f"Овертайм: {metrics['overtime']:.2f} ч\n"
+        f"Недоработка: {metrics['underwork']:.2f} ч\n"
+        f"По разработчикам:\n{authors_text}"
+    )
+
+
+def format_code_metrics(metrics):
+    hotspots_text = "\n".join(f"{hotspot['path']}: {hotspot['changes']} изменений, "
+                              f"{hotspot['churn']} строк изменено" for hotspot in metrics["hotspots"])
+    candidates_text = "\n".join(f"{hotspot['path']}: оценка {hotspot['score']:.1f} "
+                                 f"(сложность {hotspot['complexity']}, изменений {hotspot['changes']})"
+                                 for hotspot in metrics["refactoring_candidates"])
+    return (
+        f"Добавлено строк: {metrics['added_lines']}\n"
+        f"Удалено строк: {metrics['deleted_lines']}\n"
+        f"Средняя цикломатическая сложность: {metrics['avg_cc']:.2f}\n"
+        f"Сложные файлы:\n" + "\n".join(f"{file}: {cc}" for file, cc in metrics["complex_files"]) + "\n"
+        f"Часто изменяемые файлы:\n{hotspots_text}\n"
+        f"Рекомендации: Проверить файлы с высокой сложностью для рефакторинга.\n"
+        f"Кандидаты на рефакторинг:\n{candidates_text}"
+    )
+
+
+def open_stats_cache(cache_dir):
+    return StatsCache(os.path.join(cache_dir, "DevMetricsApp_stats.sqlite"))
+
+
+def open_complexity_index(cache_dir):
+    return ComplexityIndex(os.path.join(cache_dir, "DevMetricsApp_complexity.sqlite"))
+
+
+def analyze_repository(project_path, since=None, until=None, max_count=None, cache_dir=None, workers=None,
+                       idle_gap=DEFAULT_IDLE_GAP, export_path=None):
+    stats_cache = open_stats_cache(cache_dir) if cache_dir else None
+    complexity_index = open_complexity_index(cache_dir) if cache_dir else None
+    try:
+        with stage("history"):
+            if head_commit(project_path) is None:
+                history = CommitHistory(project_path, since, until)
+            else:
+                history = load_history(project_path, since, until, max_count, stats_cache)
+        report = {"project_path": project_path, "since": since, "until": until}
+        with stage("time"):
+            report["time"] = compute_time_metrics(history, idle_gap=idle_gap)
+        with stage("code"):
+            report["code"] = compute_code_metrics(history, complexity_index, workers)
+        with stage("graph"):
+            report["graph"] = compute_graph_metrics(history)
+        if export_path:
+            with stage("export"):
+                export_results(export_path, history, report)
+        return report
+    finally:
+        if stats_cache is not None:
+            stats_cache.close()
+        if complexity_index is not None:
+            complexity_index.close()
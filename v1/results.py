@@ -0,0 +1,108 @@
+import json
+import os
+import time
+import numpy as np
+from history import CommitHistory
+
+
+FORMAT_VERSION = 1
+METADATA_FILE = "metadata.json"
+COMMIT_COLUMNS = ("author_ids", "committed_dates", "tz_offsets", "authored_dates", "author_tz_offsets",
+                  "parent_counts")
+FILE_COLUMNS = ("file_commits", "file_ids", "file_insertions", "file_deletions", "file_old_ids")
+
+
+class ShaColumn:
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [value.decode('ascii') for value in self.values[index]]
+        return self.values[index].decode('ascii')
+
+    def __iter__(self):
+        for value in self.values:
+            yield value.decode('ascii')
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+
+def json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def export_results(path, history, report):
+    os.makedirs(path, exist_ok=True)
+    metadata_path = os.path.join(path, METADATA_FILE)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    def save(name, values):
+        np.save(os.path.join(path, f"{name}.npy"), values)
+
+    save("shas", np.array(history.shas, dtype=bytes))
+    for column in COMMIT_COLUMNS + FILE_COLUMNS:
+        save(column, getattr(history, column))
+    save("heatmap", np.asarray(report["time"]["heatmap"], dtype=float))
+    save("commits_per_week", np.asarray(report["graph"]["commits_per_week"], dtype=np.int64))
+    file_complexity = report["code"].get("file_complexity", {})
+    save("file_complexity", np.array(list(file_complexity.values()), dtype=np.int64))
+
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "created": int(time.time()),
+        "project_path": report["project_path"],
+        "since": report["since"],
+        "until": report["until"],
+        "author_names": history.author_names,
+        "file_paths": history.file_paths,
+        "complexity_paths": list(file_complexity),
+        "time": {key: value for key, value in report["time"].items() if key != "heatmap"},
+        "code": {key: value for key, value in report["code"].items() if key != "file_complexity"},
+        "graph": {key: value for key, value in report["graph"].items() if key != "commits_per_week"},
+    }
+    with open(metadata_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, default=json_default, ensure_ascii=False)
+    os.replace(metadata_path + ".tmp", metadata_path)
+
+
+def import_results(path, mmap=True):
+    metadata_path = os.path.join(path, METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        raise ValueError(f"в каталоге {path} нет сохранённых результатов анализа")
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"неподдерживаемая версия формата: {metadata.get('format_version')}")
+
+    def load(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+
+    history = CommitHistory(metadata["project_path"], metadata["since"], metadata["until"])
+    history.shas = ShaColumn(load("shas"))
+    history.author_names = metadata["author_names"]
+    history.file_paths = metadata["file_paths"]
+    for column in COMMIT_COLUMNS + FILE_COLUMNS:
+        setattr(history, column, load(column))
+
+    code = dict(metadata["code"])
+    code["file_complexity"] = dict(zip(metadata["complexity_paths"], load("file_complexity").tolist()))
+    return {
+        "project_path": metadata["project_path"],
+        "since": metadata["since"],
+        "until": metadata["until"],
+        "created": metadata["created"],
+        "time": dict(metadata["time"], heatmap=load("heatmap")),
+        "code": code,
+        "graph": dict(metadata["graph"], commits_per_week=load("commits_per_week")),
+        "history": history,
+    }
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+DAY = 86400
+WEEK = 7 * DAY
+DEFAULT_IDLE_GAP = 120 * 60
+FIRST_COMMIT_CREDIT = 30 * 60
+NORM_HOURS = 8
+
+
+class Sessions:
+    def __init__(self, author_ids, starts, ends, tz_offsets, commits):
+        self.author_ids = author_ids
+        self.starts = starts
+        self.ends = ends
+        self.tz_offsets = tz_offsets
+        self.commits = commits
+        self.durations = ends - starts + FIRST_COMMIT_CREDIT
+
+    def __len__(self):
+        return len(self.starts)
+
+
+def detect_sessions(history, idle_gap=DEFAULT_IDLE_GAP):
+    order = np.lexsort((history.authored_dates, history.author_ids))
+    authors = history.author_ids[order]
+    dates = history.authored_dates[order]
+    if not len(dates):
+        empty = np.zeros(0, dtype=np.int64)
+        return Sessions(empty.astype(np.int32), empty, empty, empty, empty)
+
+    boundaries = np.ones(len(dates), dtype=bool)
+    boundaries[1:] = (authors[1:] != authors[:-1]) | (np.diff(dates) > idle_gap)
+    first = np.flatnonzero(boundaries)
+    last = np.append(first[1:], len(dates)) - 1
+    return Sessions(authors[first], dates[first], dates[last],
+                    history.author_tz_offsets[order][first].astype(np.int64), last - first + 1)
+
+
+def author_workload(history, sessions, now_ts):
+    authors = len(history.author_names)
+    today = (sessions.starts + sessions.tz_offsets) // DAY == (now_ts + sessions.tz_offsets) // DAY
+    this_week = sessions.starts >= now_ts - WEEK
+    daily = np.bincount(sessions.author_ids[today], sessions.durations[today], minlength=authors) / 3600
+    weekly = np.bincount(sessions.author_ids[this_week], sessions.durations[this_week], minlength=authors) / 3600
+    counts = np.bincount(sessions.author_ids, minlength=authors)
+    totals = np.bincount(sessions.author_ids, sessions.durations, minlength=authors) / 3600
+
+    workload = []
+    for author_id in np.flatnonzero(counts).tolist():
+        workload.append({
+            "author": history.author_names[author_id],
+            "daily_hours": float(daily[author_id]),
+            "weekly_hours": float(weekly[author_id]),
+            "sessions": int(counts[author_id]),
+            "avg_session": float(totals[author_id] / counts[author_id]),
+            "overtime": max(0.0, float(daily[author_id]) - NORM_HOURS),
+            "underwork": max(0.0, NORM_HOURS - float(daily[author_id])) if weekly[author_id] else 0.0,
+        })
+    workload.sort(key=lambda row: row["weekly_hours"], reverse=True)
+    return workload
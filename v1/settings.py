@@ -1,6 +1,7 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton,
-                             QFileDialog, QLineEdit, QMessageBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
+                             QFileDialog, QLineEdit, QMessageBox, QDateEdit, QSpinBox,
+                             QCheckBox)
+from PyQt5.QtCore import Qt, QDate, QDateTime, QTime
 from PyQt5.QtGui import QPalette, QColor
 import os
 
@@ -12,6 +13,13 @@ class SettingsPanel(QWidget):
             "Светлая": self.light_theme,
             "Темная": self.dark_theme
         }
+        self.periods = {
+            "Последние 4 недели": 28,
+            "Последние 3 месяца": 91,
+            "Последний год": 365,
+            "Вся история": None,
+            "Выбранный диапазон": None
+        }
         self.init_ui()
 
     def init_ui(self):
@@ -20,12 +28,47 @@ class SettingsPanel(QWidget):
         layout.addWidget(QLabel("Путь к проекту:"))
         self.project_path_input = QLineEdit()
         self.project_path_input.setPlaceholderText("Введите путь к проекту...")
+        self.project_path_input.textChanged.connect(self.parent.cancel_analysis)
         layout.addWidget(self.project_path_input)
 
         browse_btn = QPushButton("Обзор")
         browse_btn.clicked.connect(self.browse_project)
         layout.addWidget(browse_btn)
 
+        layout.addWidget(QLabel("Период анализа:"))
+        self.period_selector = QComboBox()
+        self.period_selector.addItems(self.periods.keys())
+        self.period_selector.currentTextChanged.connect(self.change_period)
+        layout.addWidget(self.period_selector)
+
+        self.range_widget = QWidget()
+        range_layout = QHBoxLayout(self.range_widget)
+        range_layout.setContentsMargins(0, 0, 0, 0)
+        range_layout.addWidget(QLabel("С:"))
+        self.since_input = QDateEdit(QDate.currentDate().addDays(-28))
+        self.since_input.setCalendarPopup(True)
+        self.since_input.setDisplayFormat("dd.MM.yyyy")
+        range_layout.addWidget(self.since_input)
+        range_layout.addWidget(QLabel("По:"))
+        self.until_input = QDateEdit(QDate.currentDate())
+        self.until_input.setCalendarPopup(True)
+        self.until_input.setDisplayFormat("dd.MM.yyyy")
+        range_layout.addWidget(self.until_input)
+        self.range_widget.hide()
+        layout.addWidget(self.range_widget)
+
+        layout.addWidget(QLabel("Перерыв, завершающий сессию (мин):"))
+        self.idle_gap_input = QSpinBox()
+        self.idle_gap_input.setRange(5, 24 * 60)
+        self.idle_gap_input.setValue(120)
+        layout.addWidget(self.idle_gap_input)
+
+        self.watch_checkbox = QCheckBox("Обновлять метрики при изменениях в репозитории")
+        layout.addWidget(self.watch_checkbox)
+
+        self.profile_checkbox = QCheckBox("Профилировать анализ (cProfile)")
+        layout.addWidget(self.profile_checkbox)
+
         layout.addWidget(QLabel("Тема:"))
         self.theme_selector = QComboBox()
         self.theme_selector.addItems(self.themes.keys())
@@ -47,12 +90,57 @@ class SettingsPanel(QWidget):
 
         self.parent.settings.setValue("project_path", project_path)
         self.parent.settings.setValue("theme", self.theme_selector.currentText())
+        self.save_analysis_settings(self.parent.settings)
         self.parent.settings.sync()
 
         self.change_theme(self.theme_selector.currentText())
-        self.parent.update_time_metrics()
-        self.parent.update_code_metrics()
-        self.parent.update_graph_metrics()
+        self.parent.refresh_metrics()
+        self.parent.update_watcher()
+
+    def change_period(self, period_name):
+        self.range_widget.setVisible(period_name == "Выбранный диапазон")
+
+    def load_analysis_settings(self, settings):
+        self.period_selector.setCurrentText(settings.value("period", "Последние 4 недели"))
+        self.idle_gap_input.setValue(int(settings.value("idle_gap", 120)))
+        self.watch_checkbox.setChecked(settings.value("watch", "false") == "true")
+        self.profile_checkbox.setChecked(settings.value("profile", "false") == "true")
+        since = QDate.fromString(settings.value("since", ""), Qt.ISODate)
+        until = QDate.fromString(settings.value("until", ""), Qt.ISODate)
+        if since.isValid():
+            self.since_input.setDate(since)
+        if until.isValid():
+            self.until_input.setDate(until)
+        self.change_period(self.period_selector.currentText())
+
+    def save_analysis_settings(self, settings):
+        settings.setValue("period", self.period_selector.currentText())
+        settings.setValue("idle_gap", self.idle_gap_input.value())
+        settings.setValue("watch", "true" if self.watch_checkbox.isChecked() else "false")
+        settings.setValue("profile", "true" if self.profile_checkbox.isChecked() else "false")
+        settings.setValue("since", self.since_input.date().toString(Qt.ISODate))
+        settings.setValue("until", self.until_input.date().toString(Qt.ISODate))
+
+    def analysis_context(self):
+        period_name = self.period_selector.currentText()
+        dates = ()
+        if period_name == "Выбранный диапазон":
+            dates = (self.since_input.date().toString(Qt.ISODate), self.until_input.date().toString(Qt.ISODate))
+        return self.project_path_input.text(), period_name, dates, self.idle_gap_input.value()
+
+    def idle_gap(self):
+        return self.idle_gap_input.value() * 60
+
+    def time_window(self):
+        period_name = self.period_selector.currentText()
+        if period_name == "Выбранный диапазон":
+            since = QDateTime(self.since_input.date(), QTime(0, 0))
+            until = QDateTime(self.until_input.date().addDays(1), QTime(0, 0))
+            return since.toSecsSinceEpoch(), until.toSecsSinceEpoch() - 1
+        days = self.periods.get(period_name)
+        if days is None:
+            return None, None
+        return QDateTime.currentDateTime().addDays(-days).toSecsSinceEpoch(), None
 
     def change_theme(self, theme_name):
         theme_func = self.themes.get(theme_name, self.light_theme)
@@ -0,0 +1,40 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+
+class GitRepository:
+    def __init__(self):
+        self.path = tempfile.mkdtemp(prefix="devmetrics-test-")
+        self.git("init", "-q", "-b", "master")
+        self.clock = 1700000000
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def git(self, *args, **env):
+        environment = dict(os.environ, GIT_CONFIG_NOSYSTEM="1", HOME=self.path, **env)
+        result = subprocess.run(["git", "-C", self.path, *args], env=environment, check=True,
+                                stdin=subprocess.DEVNULL, capture_output=True)
+        return result.stdout.decode().strip()
+
+    def write(self, name, content):
+        path = os.path.join(self.path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def commit(self, message, author="Developer", tz="+0300"):
+        self.clock += 3600
+        date = f"{self.clock} {tz}"
+        self.git("add", "-A")
+        self.git("-c", "user.name=" + author, "-c", "user.email=dev@example.com", "commit", "-q",
+                 "--allow-empty", "-m", message, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+        return self.git("rev-parse", "HEAD")
+
+
+def lines(count, prefix="line"):
+    return "".join(f"{prefix} {index}\n" for index in range(count))
@@ -0,0 +1,37 @@
+import unittest
+from batch import analyze_batch, aggregate_reports
+from tests.gitrepo import GitRepository
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.empty = GitRepository()
+        self.project = GitRepository()
+        self.project.write("module.py", "def check(value):\n    if value:\n        return 1\n    return 0\n")
+        self.project.write("broken.py", "def broken(:\n")
+        self.project.commit("initial")
+
+    def tearDown(self):
+        self.empty.close()
+        self.project.close()
+
+    def test_empty_repository_is_a_zero_commit_row(self):
+        results = analyze_batch([self.empty.path, self.project.path], jobs=1)
+        batch_report = aggregate_reports(results)
+        empty_row, project_row = batch_report["repositories"]
+        self.assertIsNone(empty_row["error"])
+        self.assertEqual(empty_row["commits"], 0)
+        self.assertEqual(project_row["commits"], 1)
+        self.assertEqual(batch_report["summary"]["failed"], 0)
+        self.assertEqual(batch_report["summary"]["commits"], 1)
+
+    def test_average_complexity_matches_parsed_files(self):
+        batch_report = aggregate_reports(analyze_batch([self.empty.path, self.project.path], jobs=1))
+        project_row = batch_report["repositories"][1]
+        self.assertEqual(project_row["python_files"], 2)
+        self.assertEqual(project_row["avg_cc"], 2)
+        self.assertEqual(batch_report["summary"]["avg_cc"], project_row["avg_cc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import subprocess
+import unittest
+from history import LOG_FORMAT, HistoryStore, iter_log, load_history, merge_histories, parse_log_stream
+from tests.gitrepo import GitRepository, lines
+
+
+class ParseLogStreamTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.repo = repo = GitRepository()
+        repo.write("a.py", lines(10))
+        repo.write("data.bin", bytes(range(256)) * 4)
+        repo.write("папка/файл.py", lines(3))
+        cls.initial = repo.commit("initial", author="Алиса")
+        repo.write("b.py", lines(9) + "changed\n")
+        repo.git("rm", "-q", "a.py")
+        cls.renamed = repo.commit("rename")
+        repo.git("checkout", "-q", "-b", "feature")
+        repo.write("feature.py", lines(2))
+        repo.commit("feature", tz="-0500")
+        repo.git("checkout", "-q", "master")
+        repo.write("main.py", lines(4))
+        repo.commit("main")
+        repo.git("-c", "user.name=Developer", "-c", "user.email=dev@example.com", "merge", "-q", "--no-ff",
+                 "-m", "merge", "feature")
+        cls.records = {record.sha: record for record in iter_log(repo.path, numstat=True)}
+        cls.merge = repo.git("rev-parse", "HEAD")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.repo.close()
+
+    def test_binary_and_non_ascii_paths(self):
+        record = self.records[self.initial]
+        self.assertEqual(record.author, "Алиса")
+        self.assertEqual(record.tz_offset, 3 * 3600)
+        self.assertEqual(sorted(record.files), [
+            ("a.py", 10, 0, None),
+            ("data.bin", 0, 0, None),
+            ("папка/файл.py", 3, 0, None),
+        ])
+
+    def test_rename_keeps_old_path(self):
+        self.assertEqual(self.records[self.renamed].files, [("b.py", 1, 1, "a.py")])
+
+    def test_merge_reports_first_parent_diff(self):
+        record = self.records[self.merge]
+        self.assertEqual(record.parent_count, 2)
+        self.assertEqual(record.files, [("feature.py", 2, 0, None)])
+
+    def test_chunk_boundaries(self):
+        output = subprocess.run(["git", "-C", self.repo.path, "log", "-z", "--date=raw", f"--format={LOG_FORMAT}",
+                                 "--numstat", "-M", "--diff-merges=first-parent"],
+                                capture_output=True, check=True).stdout
+        whole = list(parse_log_stream([output]))
+        bytewise = list(parse_log_stream(output[index:index + 1] for index in range(len(output))))
+        self.assertEqual(bytewise, whole)
+        self.assertEqual(len(whole), 5)
+
+
+def history_rows(history):
+    commits = [(sha, history.author_names[author_id], *values)
+               for sha, author_id, *values in zip(history.shas, history.author_ids.tolist(),
+                                                  history.committed_dates.tolist(), history.tz_offsets.tolist(),
+                                                  history.authored_dates.tolist(),
+                                                  history.author_tz_offsets.tolist(),
+                                                  history.parent_counts.tolist())]
+    files = sorted((history.shas[commit], history.file_paths[file_id], insertions, deletions,
+                    history.file_paths[old_id] if old_id >= 0 else None)
+                   for commit, file_id, insertions, deletions, old_id in zip(
+                       history.file_commits.tolist(), history.file_ids.tolist(), history.file_insertions.tolist(),
+                       history.file_deletions.tolist(), history.file_old_ids.tolist()))
+    return commits, files
+
+
+class MergeHistoriesTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = repo = GitRepository()
+        repo.write("a.py", lines(10))
+        repo.commit("first", author="Алиса")
+        repo.write("b.py", lines(4))
+        self.middle = repo.commit("second")
+        repo.write("c.py", lines(10))
+        repo.git("rm", "-q", "a.py")
+        repo.commit("rename", author="Боб")
+        repo.write("b.py", lines(6))
+        repo.write("новый.py", lines(2))
+        self.head = repo.commit("third", author="Вера", tz="-0500")
+
+    def tearDown(self):
+        self.repo.close()
+
+    def test_incremental_equals_full_load(self):
+        older = load_history(self.repo.path, revision_range=self.middle)
+        newer = load_history(self.repo.path, revision_range=f"{self.middle}..{self.head}")
+        merged = merge_histories(newer, older)
+        full = load_history(self.repo.path, revision_range=self.head)
+        self.assertEqual(history_rows(merged), history_rows(full))
+        self.assertEqual(len(merged.author_names), 4)
+
+    def test_window_trims_older_commits(self):
+        since = int(load_history(self.repo.path, revision_range=self.middle).committed_dates[0])
+        older = load_history(self.repo.path, revision_range=self.middle)
+        newer = load_history(self.repo.path, since, revision_range=f"{self.middle}..{self.head}")
+        merged = merge_histories(newer, older)
+        full = load_history(self.repo.path, since, revision_range=self.head)
+        self.assertEqual(history_rows(merged), history_rows(full))
+        self.assertEqual(len(merged), 3)
+
+    def test_history_store_reuses_snapshot(self):
+        store = HistoryStore()
+        store.load(self.repo.path)
+        self.repo.write("d.py", lines(1))
+        self.repo.commit("fourth")
+        self.assertEqual(history_rows(store.load(self.repo.path)), history_rows(load_history(self.repo.path)))
+
+
+if __name__ == "__main__":
+    unittest.main()
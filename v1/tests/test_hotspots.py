@@ -0,0 +1,62 @@
+import unittest
+from history import load_history
+from hotspots import follow_renames, rank_hotspots
+from tests.gitrepo import GitRepository, lines
+
+
+class FollowRenamesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.repo = repo = GitRepository()
+        repo.write("a.py", lines(20))
+        repo.write("other.py", lines(5))
+        repo.commit("add")
+        repo.write("a.py", lines(21))
+        repo.commit("edit a")
+        repo.git("mv", "a.py", "b.py")
+        repo.commit("rename a to b")
+        repo.write("b.py", lines(22))
+        repo.write("a.py", lines(3, prefix="new"))
+        repo.commit("edit b, recreate a")
+        repo.git("mv", "b.py", "c.py")
+        repo.commit("rename b to c")
+        repo.write("c.py", lines(23))
+        repo.commit("edit c")
+        cls.history = load_history(repo.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.repo.close()
+
+    def test_rename_chain_moves_history_to_current_path(self):
+        history = self.history
+        followed = follow_renames(history)
+        counts = {}
+        for file_id in followed.tolist():
+            path = history.file_paths[file_id]
+            counts[path] = counts.get(path, 0) + 1
+        self.assertEqual(counts, {"c.py": 6, "a.py": 1, "other.py": 1})
+
+    def test_recreated_path_keeps_its_own_history(self):
+        history = self.history
+        followed = follow_renames(history)
+        recreated = [row for row, file_id in enumerate(history.file_ids.tolist())
+                     if history.file_paths[file_id] == "a.py" and history.file_old_ids[row] < 0
+                     and history.file_insertions[row] == 3]
+        self.assertEqual(len(recreated), 1)
+        self.assertEqual(history.file_paths[followed[recreated[0]]], "a.py")
+
+    def test_original_columns_are_not_modified(self):
+        before = self.history.file_ids.copy()
+        follow_renames(self.history)
+        self.assertTrue((self.history.file_ids == before).all())
+
+    def test_rank_hotspots_uses_current_path(self):
+        hotspots = rank_hotspots(self.history, {"c.py": 4})
+        self.assertEqual(hotspots["frequent"][0]["path"], "c.py")
+        self.assertEqual(hotspots["frequent"][0]["changes"], 6)
+        self.assertEqual(hotspots["candidates"][0]["complexity"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import shutil
+import tempfile
+import unittest
+from history import CommitHistory, load_history, merge_histories
+from metrics import analyze_repository
+from results import export_results, import_results
+from tests.gitrepo import GitRepository, lines
+from tests.test_history import history_rows
+
+
+class ResultsTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = GitRepository()
+        self.repo.write("a.py", lines(10))
+        self.repo.commit("first")
+        self.repo.git("mv", "a.py", "b.py")
+        self.repo.commit("rename")
+        self.path = tempfile.mkdtemp(prefix="devmetrics-results-")
+
+    def tearDown(self):
+        self.repo.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def test_imported_history_is_interchangeable(self):
+        history = load_history(self.repo.path)
+        report = analyze_repository(self.repo.path)
+        export_results(self.path, history, report)
+        imported = import_results(self.path)
+
+        self.assertEqual(history_rows(imported["history"]), history_rows(history))
+        self.assertEqual(list(imported["history"].shas), history.shas)
+        self.assertEqual(imported["history"].shas[0], history.shas[0])
+        merged = merge_histories(CommitHistory(self.repo.path), imported["history"])
+        self.assertEqual(history_rows(merged), history_rows(history))
+        self.assertEqual(imported["time"]["commits"], 2)
+        self.assertEqual(imported["code"]["file_complexity"], report["code"]["file_complexity"])
+        self.assertEqual(imported["graph"]["commits_per_week"].tolist(), report["graph"]["commits_per_week"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from discovery import iter_project_files
+from history import head_commit
+
+
+class RepositoryWatcher(QObject):
+    refs_changed = pyqtSignal()
+    files_changed = pyqtSignal()
+
+    DEBOUNCE_MS = 750
+    MAX_WATCHED_FILES = 4096
+    MAX_WATCHED_DIRS = 1024
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.project_path = None
+        self.head = None
+        self.git_changed = False
+        self.changed_files = set()
+        self.changed_dirs = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def watch(self, project_path):
+        self.stop()
+        self.project_path = project_path
+        try:
+            self.head = head_commit(project_path)
+        except Exception:
+            self.head = None
+        self.sync_paths()
+
+    def stop(self):
+        self.timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+        self.project_path = None
+        self.git_changed = False
+        self.changed_files.clear()
+        self.changed_dirs.clear()
+
+    def git_paths(self):
+        git_dir = os.path.join(self.project_path, '.git')
+        paths = [git_dir, os.path.join(git_dir, 'HEAD'), os.path.join(git_dir, 'packed-refs')]
+        for root, dirs, _ in os.walk(os.path.join(git_dir, 'refs')):
+            paths.append(root)
+        return [path for path in paths if os.path.exists(path)]
+
+    def tree_paths(self):
+        files = []
+        dirs = {self.project_path}
+        for path in iter_project_files(self.project_path, ('.py',)):
+            if len(dirs) < self.MAX_WATCHED_DIRS:
+                dirs.add(os.path.dirname(path))
+            if len(files) < self.MAX_WATCHED_FILES:
+                files.append(path)
+        return files + sorted(dirs)
+
+    def sync_paths(self):
+        if self.project_path is None:
+            return
+        watched = set(self.watcher.files() + self.watcher.directories())
+        wanted = set(self.git_paths() + self.tree_paths())
+        if watched - wanted:
+            self.watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.watcher.addPaths(list(wanted - watched))
+
+    def is_git_path(self, path):
+        git_dir = os.path.join(self.project_path, '.git')
+        return path == git_dir or path.startswith(git_dir + os.sep)
+
+    def on_file_changed(self, path):
+        if self.project_path is None:
+            return
+        if self.is_git_path(path):
+            self.git_changed = True
+        else:
+            self.changed_files.add(path)
+        self.timer.start()
+
+    def on_directory_changed(self, path):
+        if self.project_path is None:
+            return
+        if self.is_git_path(path):
+            self.git_changed = True
+        else:
+            self.changed_dirs.add(path)
+        self.timer.start()
+
+    def flush(self):
+        if self.project_path is None:
+            return
+        changed_files = set(self.changed_files)
+        for directory in self.changed_dirs:
+            if os.path.isdir(directory):
+                changed_files.update(entry.path for entry in os.scandir(directory)
+                                     if entry.name.endswith('.py') and entry.is_file())
+        git_changed = self.git_changed
+        structure_changed = git_changed or bool(self.changed_dirs)
+        self.git_changed = False
+        self.changed_files.clear()
+        self.changed_dirs.clear()
+        if structure_changed:
+            self.sync_paths()
+        else:
+            missing = [path for path in changed_files
+                       if os.path.exists(path) and path not in self.watcher.files()]
+            if missing:
+                self.watcher.addPaths(missing)
+
+        if git_changed:
+            try:
+                head = head_commit(self.project_path)
+            except Exception:
+                head = None
+            if head != self.head:
+                self.head = head
+                self.refs_changed.emit()
+                return
+        if changed_files:
+            self.files_changed.emit()